@@ -0,0 +1,346 @@
+"""Local stand-in for the parts of the KoboToolbox v2 API that bifrost uses.
+
+Serves assets (list, detail with ETags, XLS/XML downloads), submission data,
+imports, deployments, exports, permission assignments and attachment media from
+memory. Latency, job durations and payload sizes are configurable so the
+benchmarks can reproduce slow servers, long running jobs and large downloads.
+
+Run it standalone to point a real bifrost config at it:
+
+    python benchmarks/mock_kobo.py --port 8000 --latency 0.05 --job-seconds 2
+"""
+import argparse
+import datetime
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+API_PREFIX = "/api/v2/"
+OWNER = "bench"
+# Listed for the owner by the permission-assignments endpoint, like KPI does.
+OWNER_PERMISSIONS = ("view_asset", "change_asset", "manage_asset", "view_submissions")
+
+SURVEY = [
+    {"type": "text", "name": "name", "$xpath": "name"},
+    {"type": "integer", "name": "age", "$xpath": "age"},
+    {"type": "begin_group", "name": "grp"},
+    {"type": "decimal", "name": "score", "$xpath": "grp/score"},
+    {"type": "end_group"},
+    {"type": "date", "name": "visit", "$xpath": "visit"},
+    {"type": "image", "name": "photo", "$xpath": "photo"},
+]
+# Values of the "visit" column in CSV exports, repeated in this order.
+EXPORT_VISITS = tuple(f"2024-01-{day:02d}" for day in range(1, 11))
+
+
+def asset_uid(index:int) -> str:
+    # Same shape as real KoboToolbox asset UIDs ("a" + 21 characters).
+    return f"a{index:021d}"
+
+
+class MockKobo:
+    """In-memory KoboToolbox server running on a background thread.
+
+    ``latency`` is added to every request, ``job_seconds`` is how long imports and
+    exports stay "processing", ``payload_bytes`` is the size of export and asset
+    files and ``attachment_bytes`` the size of each attachment.
+    """
+
+    def __init__(self, assets:int= 25, submissions:int= 1000, attachments:int= 1, latency:float= 0.0,
+                 job_seconds:float= 1.0, payload_bytes:int= 1_000_000, attachment_bytes:int= 50_000,
+                 host:str= "127.0.0.1", port:int= 0) -> None:
+        self.latency = latency
+        self.job_seconds = job_seconds
+        self.payload_bytes = payload_bytes
+        self.attachment_bytes = attachment_bytes
+        self._export_body = (None, b"")
+        self.lock = threading.Lock()
+        self.request_count = 0
+        # "<METHOD> <handler>" -> number of requests, e.g. "POST start_export".
+        self.route_counts = Counter()
+        self.jobs = {}
+        self.assets = {}
+        self.submissions = {}
+        self.permissions = {}
+        for index in range(assets):
+            self.add_asset(asset_uid(index), f"Form {index}", submissions, attachments)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def add_asset(self, uid:str, name:str, submissions:int= 0, attachments:int= 0) -> dict:
+        asset = {
+            "uid": uid,
+            "name": name,
+            "owner__username": OWNER,
+            "asset_type": "survey",
+            "deployment_status": "deployed",
+            "has_deployment": True,
+            "version_id": "v2",
+            "deployed_version_id": "v1",
+            "version_count": 2,
+            "deployment__submission_count": submissions,
+            "date_modified": "2024-01-01T00:00:00Z",
+            "content": {"survey": SURVEY},
+        }
+        self.assets[uid] = asset
+        start = datetime.datetime(2024, 1, 1)
+        self.submissions[uid] = [{
+            "_id": _id,
+            "_uuid": uuid.UUID(int=_id).hex,
+            "_submission_time": (start + datetime.timedelta(hours=_id)).isoformat(),
+            "_submitted_by": None,
+            "_status": "submitted_via_web",
+            "name": f"Respondent {_id}",
+            "age": str(20 + _id % 50),
+            "grp/score": str(_id * 1.5),
+            "visit": (start + datetime.timedelta(days=_id % 365)).date().isoformat(),
+            "_attachments": [{
+                "id": _id * 10 + n,
+                "download_url": f"{API_PREFIX}media/{uid}/{_id}_{n}.jpg",
+                "filename": f"bench/attachments/{uid}/{_id}_{n}.jpg",
+                "mimetype": "image/jpeg",
+                "question_xpath": "photo",
+            } for n in range(attachments)],
+        } for _id in range(1, submissions + 1)]
+        return asset
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.request_count = 0
+            self.route_counts.clear()
+
+    def export_body(self) -> bytes:
+        # Built once per payload size; every row has the same length.
+        if self._export_body[0] != self.payload_bytes:
+            header = b"_id,name,age,grp/score,visit\n"
+            rows = [f"1,Respondent 1,21,1.5,{visit}\n".encode() for visit in EXPORT_VISITS]
+            count = max(0, (self.payload_bytes - len(header)) // len(rows[0]))
+            self._export_body = (self.payload_bytes, header + b"".join(rows[index % len(rows)] for index in range(count)))
+        return self._export_body[1]
+
+    def start(self) -> "MockKobo":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _start_job(self, kind:str, **result) -> str:
+        job_uid = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_uid] = {"kind": kind, "started": time.monotonic(), **result}
+        return job_uid
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def origin(self) -> str:
+                return f"http://{self.headers['Host']}"
+
+            def send_json(self, status:int, data=None, headers:dict= None) -> None:
+                body = json.dumps(data).encode() if data is not None else b""
+                self.send_body(status, body, "application/json", headers)
+
+            def send_body(self, status:int, body:bytes, content_type:str, headers:dict= None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def handle_request(self) -> None:
+                with mock.lock:
+                    mock.request_count += 1
+                if mock.latency:
+                    time.sleep(mock.latency)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.body = self.rfile.read(length) if length else b""
+                self.json_body = json.loads(body) if self.headers.get("Content-Type") == "application/json" else None
+                url = urlsplit(self.path)
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                for method, pattern, route in ROUTES:
+                    match = pattern.fullmatch(url.path)
+                    if match and self.command in method.split():
+                        with mock.lock:
+                            mock.route_counts[f"{self.command} {route.__name__}"] += 1
+                        return route(self, query, *match.groups())
+                self.send_json(404, {"detail": "Not found."})
+
+            do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = handle_request
+
+            def list_assets(self, query:dict) -> None:
+                limit = int(query.get("limit", 100))
+                offset = int(query.get("offset", 0))
+                assets = list(mock.assets.values())
+                next_url = None
+                if offset + limit < len(assets):
+                    next_url = f"{self.origin()}{API_PREFIX}assets/?{urlencode({**query, 'offset': offset + limit})}"
+                self.send_json(200, {"count": len(assets), "next": next_url, "previous": None, "results": assets[offset:offset + limit]})
+
+            def asset_detail(self, query:dict, uid:str) -> None:
+                asset = mock.assets.get(uid)
+                if asset is None:
+                    return self.send_json(404, {"detail": "Not found."})
+                if self.command == "DELETE":
+                    del mock.assets[uid]
+                    return self.send_json(204)
+                etag = f'"{uid}-{asset["version_id"]}-{asset.get("deployed_version_id")}-{asset["deployment__submission_count"]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self.send_body(304, b"", "application/json", {"ETag": etag})
+                self.send_body(200, json.dumps(asset).encode(), "application/json", {"ETag": etag})
+
+            def asset_file(self, query:dict, uid:str, extension:str) -> None:
+                self.send_body(200, b"\0" * mock.payload_bytes, "application/octet-stream", {"ETag": f'"{uid}.{extension}"'})
+
+            def asset_data(self, query:dict, uid:str) -> None:
+                submissions = mock.submissions.get(uid, [])
+                last_id = json.loads(query.get("query", "{}")).get("_id", {}).get("$gt")
+                if last_id is not None:
+                    submissions = [submission for submission in submissions if submission["_id"] > last_id]
+                limit = int(query.get("limit", 100))
+                start = int(query.get("start", 0))
+                next_url = None
+                if start + limit < len(submissions):
+                    next_url = f"{self.origin()}{API_PREFIX}assets/{uid}/data/?{urlencode({**query, 'start': start + limit})}"
+                results = [self.with_media_urls(submission) for submission in submissions[start:start + limit]]
+                self.send_json(200, {"count": len(submissions), "next": next_url, "previous": None, "results": results})
+
+            def with_media_urls(self, submission:dict) -> dict:
+                attachments = [{**attachment, "download_url": f"{self.origin()}{attachment['download_url']}"} for attachment in submission["_attachments"]]
+                return {**submission, "_attachments": attachments}
+
+            def start_import(self, query:dict) -> None:
+                # Imports with an "assetUid" form field replace the content of that asset.
+                destination = re.search(rb'name="assetUid"\r\n\r\n([A-Za-z0-9]+)', self.body)
+                new_uid = destination.group(1).decode() if destination else f"b{uuid.uuid4().hex[:21]}"
+                job_uid = mock._start_job("import", uid=new_uid)
+                self.send_json(201, {"uid": job_uid, "url": f"{self.origin()}{API_PREFIX}imports/{job_uid}/", "status": "created"})
+
+            def import_status(self, query:dict, job_uid:str) -> None:
+                job = mock.jobs.get(job_uid)
+                if job is None:
+                    return self.send_json(404, {"detail": "Not found."})
+                if time.monotonic() - job["started"] < mock.job_seconds:
+                    return self.send_json(200, {"uid": job_uid, "status": "processing"})
+                with mock.lock:
+                    if job["uid"] not in mock.assets:
+                        mock.add_asset(job["uid"], f"Imported {job['uid']}")
+                        mock.assets[job["uid"]].update(deployment_status="draft", has_deployment=False)
+                    elif not job.get("applied"):
+                        asset = mock.assets[job["uid"]]
+                        asset["version_count"] += 1
+                        asset["version_id"] = f"v{asset['version_count']}"
+                    job["applied"] = True
+                created = [{"uid": job["uid"], "kind": "asset", "owner__username": OWNER}]
+                self.send_json(200, {"uid": job_uid, "status": "complete", "messages": {"created": created}})
+
+            def deployment(self, query:dict, uid:str) -> None:
+                asset = mock.assets.setdefault(uid, {"uid": uid, "version_id": "v1", "version_count": 1, "deployment__submission_count": 0})
+                if self.command in ("POST", "PATCH"):
+                    asset.update(deployment_status="deployed", has_deployment=True, deployed_version_id=asset["version_id"])
+                status = 201 if self.command == "POST" else 200
+                self.send_json(status, {"asset": {**asset, "deployment__links": {"url": f"{self.origin()}/x/{uid}"}}})
+
+            def start_export(self, query:dict, uid:str) -> None:
+                job_uid = mock._start_job("export", asset=uid)
+                self.send_json(201, {"uid": job_uid, "url": f"{self.origin()}{API_PREFIX}assets/{uid}/exports/{job_uid}/", "status": "created"})
+
+            def export_status(self, query:dict, uid:str, job_uid:str) -> None:
+                job = mock.jobs.get(job_uid)
+                if job is None:
+                    return self.send_json(404, {"detail": "Not found."})
+                if time.monotonic() - job["started"] < mock.job_seconds:
+                    return self.send_json(200, {"uid": job_uid, "status": "processing", "result": None})
+                self.send_json(200, {"uid": job_uid, "status": "complete", "result": f"{self.origin()}{API_PREFIX}files/{job_uid}.csv"})
+
+            def export_file(self, query:dict, job_uid:str) -> None:
+                self.send_body(200, mock.export_body(), "text/csv", {"ETag": f'"{job_uid}"'})
+
+            def permission_assignments(self, query:dict, uid:str, action:str) -> None:
+                assignments = mock.permissions.setdefault(uid, [])
+                owner_url = f"{self.origin()}{API_PREFIX}users/{OWNER}/"
+                if self.command == "GET":
+                    owned = [{"user": owner_url, "permission": f"{self.origin()}{API_PREFIX}permissions/{codename}/"} for codename in OWNER_PERMISSIONS]
+                    return self.send_json(200, [{"url": f"{self.origin()}{API_PREFIX}assets/{uid}/permission-assignments/{n}/", **assignment}
+                                                for n, assignment in enumerate(owned + assignments)])
+                if action == "bulk/":
+                    if any(assignment["user"] == owner_url for assignment in self.json_body):
+                        return self.send_json(400, {"user": ["Owner's permissions cannot be assigned explicitly"]})
+                    assignments[:] = [{"user": assignment["user"], "permission": assignment["permission"]} for assignment in self.json_body]
+                    return self.send_json(200, assignments)
+                if action == "clone/":
+                    return self.send_json(200, assignments)
+                self.send_json(201, {})
+
+            def media(self, query:dict, uid:str, name:str) -> None:
+                self.send_body(200, b"\xff" * mock.attachment_bytes, "image/jpeg", {"ETag": f'"{name}"'})
+
+        uid = r"([A-Za-z0-9]+)"
+        ROUTES = [
+            ("GET", re.compile(f"{API_PREFIX}assets/"), Handler.list_assets),
+            ("GET DELETE", re.compile(f"{API_PREFIX}assets/{uid}/"), Handler.asset_detail),
+            ("GET", re.compile(f"{API_PREFIX}assets/{uid}\\.(xls|xml)/"), Handler.asset_file),
+            ("GET", re.compile(f"{API_PREFIX}assets/{uid}/data/"), Handler.asset_data),
+            ("POST", re.compile(f"{API_PREFIX}imports/"), Handler.start_import),
+            ("GET", re.compile(f"{API_PREFIX}imports/{uid}/"), Handler.import_status),
+            ("GET POST PATCH", re.compile(f"{API_PREFIX}assets/{uid}/deployment/"), Handler.deployment),
+            ("POST", re.compile(f"{API_PREFIX}assets/{uid}/exports/"), Handler.start_export),
+            ("GET", re.compile(f"{API_PREFIX}assets/{uid}/exports/{uid}/"), Handler.export_status),
+            ("GET", re.compile(f"{API_PREFIX}files/{uid}\\.csv"), Handler.export_file),
+            ("GET POST PATCH", re.compile(f"{API_PREFIX}assets/{uid}/permission-assignments/(clone/|bulk/)?"), Handler.permission_assignments),
+            ("GET HEAD", re.compile(f"{API_PREFIX}media/{uid}/([^/]+)"), Handler.media),
+        ]
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--assets", type=int, default=25)
+    parser.add_argument("--submissions", type=int, default=1000, help="Submissions per asset")
+    parser.add_argument("--attachments", type=int, default=1, help="Attachments per submission")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--job-seconds", type=float, default=1.0, help="Seconds imports and exports stay processing")
+    parser.add_argument("--payload-bytes", type=int, default=1_000_000, help="Size of export and asset files")
+    parser.add_argument("--attachment-bytes", type=int, default=50_000)
+    opts = parser.parse_args()
+    mock = MockKobo(assets=opts.assets, submissions=opts.submissions, attachments=opts.attachments, latency=opts.latency,
+                    job_seconds=opts.job_seconds, payload_bytes=opts.payload_bytes, attachment_bytes=opts.attachment_bytes,
+                    port=opts.port)
+    print(f"Serving a mock KoboToolbox API at {mock.base_url} (Ctrl+C to stop)")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
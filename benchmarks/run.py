@@ -0,0 +1,358 @@
+"""End-to-end benchmarks of bifrost CLI commands against a local mock KoboToolbox server.
+
+Every scenario runs the real CLI in a fresh interpreter with a throwaway HOME
+(empty cache, config pointing at the mock server) and records wall time, the
+number of HTTP requests the server received and the peak resident memory of the
+process. The median of --repeat runs is reported.
+
+    python benchmarks/run.py --save baseline.json
+    python benchmarks/run.py --baseline baseline.json --threshold 0.2
+
+With --baseline the run fails (exit code 1) when a scenario got slower or used
+more memory than the baseline by more than --threshold, or made more requests.
+
+The CLI reports most failures by printing them, so every run is also checked
+against what the scenario should have done: the requests each mock endpoint
+received and the files written. A run that does not match fails the scenario
+(exit code 1) instead of being timed as a fast success.
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_kobo import EXPORT_VISITS, MockKobo, asset_uid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from bifrost_cli.bifrost import ATTACHMENTS_DIR, DEFAULT_PAGE_SIZE, DEFAULT_SYNC_PAGE_SIZE, SUBMISSIONS_FILE
+
+UID = asset_uid(0)
+FORM_COUNT = 4
+OTHER_UID = asset_uid(1)
+BATCH_UIDS = [asset_uid(index) for index in range(4)]
+
+# Job status checks depend on timing, so any number of them is accepted.
+POLLED = range(1, 10_000)
+
+
+def pages(items:int, page_size:int) -> int:
+    return max(1, math.ceil(items / page_size))
+
+
+def submissions(mock:MockKobo, uid:str) -> int:
+    return len(mock.submissions[uid])
+
+
+def attachments(mock:MockKobo, uid:str) -> int:
+    return sum(len(submission["_attachments"]) for submission in mock.submissions[uid])
+
+
+# name -> CLI arguments ("args") and what a successful run does: requests per mock
+# endpoint ("routes", keyed "<METHOD> <handler>") and files under the downloads
+# folder ("files", path -> (unit, amount) with unit "bytes", "lines", "rows" or
+# "files"; with "only_files" no other file may be left there). "payload_bytes"
+# overrides the size of export and asset files for the scenario and
+# "max_peak_memory" bounds the memory of the process. Callables are evaluated with the mock server just before the run, since
+# scenarios such as create-deploy add assets, after the optional "setup" has
+# reset the state the command changes. "{forms}" is a directory of
+# XLSForm files and "{form}" one of them; both are created inside the run's HOME.
+SCENARIOS = {
+    "list-assets": {
+        "args": ["list-assets"],
+        "routes": {"GET list_assets": lambda mock: pages(len(mock.assets), DEFAULT_PAGE_SIZE)},
+    },
+    "list-assets-json": {
+        "args": ["list-assets", "--json"],
+        "routes": {"GET list_assets": lambda mock: pages(len(mock.assets), DEFAULT_PAGE_SIZE)},
+        "json_items": lambda mock: len(mock.assets),
+    },
+    "create-deploy": {
+        "args": ["create", "{form}", "-d"],
+        "routes": {"POST start_import": 1, "GET import_status": POLLED, "POST deployment": 1},
+    },
+    "update-redeploy": {
+        "args": ["update", UID, "{form}", "-rd", "-f"],
+        "routes": {"POST start_import": 1, "GET import_status": POLLED, "GET asset_detail": 1, "PATCH deployment": 1},
+    },
+    "redeploy": {
+        "args": ["redeploy", UID],
+        "routes": {"GET asset_detail": 1, "PATCH deployment": 1},
+    },
+    "asset-xls": {
+        "args": ["asset", "xls", UID, "--no-progress"],
+        "routes": {"GET asset_file": 1},
+        "files": {f"{UID}.xlsx": ("bytes", lambda mock: mock.payload_bytes)},
+    },
+    "export-csv": {
+        "args": ["export", "csv", UID, "export.csv", "--no-progress"],
+        "routes": {"GET asset_detail": 1, "POST start_export": 1, "GET export_status": POLLED, "GET export_file": 1},
+        "files": {"export.csv": ("bytes", lambda mock: len(mock.export_body()))},
+    },
+    "export-csv-split": {
+        "args": ["export", "csv", UID, "split.csv", "--no-progress", "--split-by", "visit", "--compress", "gzip"],
+        # Ten times the default export, so holding it in memory would exceed the bound.
+        "payload_bytes": 50_000_000,
+        "max_peak_memory": 100_000_000,
+        "routes": {"GET asset_detail": 1, "POST start_export": 1, "GET export_status": POLLED, "GET export_file": 1},
+        "files": {f"split.{visit}.csv.gz": ("rows", lambda mock, visit=visit: mock.export_body().count(f",{visit}\n".encode()))
+                  for visit in EXPORT_VISITS},
+        # The raw export is staged next to the outputs and must not be left behind.
+        "only_files": True,
+    },
+    "export-batch": {
+        "args": ["export", "batch", *BATCH_UIDS],
+        "routes": {"GET asset_detail": len(BATCH_UIDS), "POST start_export": len(BATCH_UIDS), "GET export_status": POLLED,
+                   "GET export_file": len(BATCH_UIDS)},
+        "files": {f"{uid}.csv": ("bytes", lambda mock: len(mock.export_body())) for uid in BATCH_UIDS},
+    },
+    "sync": {
+        "args": ["sync", UID],
+        "routes": {"GET asset_data": lambda mock: pages(submissions(mock, UID), DEFAULT_SYNC_PAGE_SIZE)},
+        "files": {f"{UID}/{SUBMISSIONS_FILE}": ("lines", lambda mock: submissions(mock, UID))},
+    },
+    "attachments": {
+        "args": ["attachments", UID],
+        "routes": {"GET asset_data": lambda mock: pages(submissions(mock, UID), DEFAULT_SYNC_PAGE_SIZE),
+                   "GET media": lambda mock: attachments(mock, UID)},
+        "files": {f"{UID}/{ATTACHMENTS_DIR}": ("files", lambda mock: attachments(mock, UID))},
+    },
+    "clone-permissions": {
+        "args": ["clone-permissions", OTHER_UID, UID],
+        "routes": {"PATCH permission_assignments": 1},
+    },
+    "set-permissions-query": {
+        "args": ["set-permissions", "-q", "asset_type:survey", "-u", "team", "-p", "view_asset", "-p", "view_submissions"],
+        # Start without the grants, so repeated runs don't find them already assigned.
+        "setup": lambda mock: mock.permissions.clear(),
+        "routes": {"GET list_assets": lambda mock: pages(len(mock.assets), DEFAULT_PAGE_SIZE),
+                   "GET asset_detail": lambda mock: len(mock.assets),
+                   "GET permission_assignments": lambda mock: len(mock.assets),
+                   "POST permission_assignments": lambda mock: len(mock.assets)},
+    },
+    "sync-forms": {
+        "args": ["sync-forms", "{forms}", "-d"],
+        "routes": {"POST start_import": FORM_COUNT, "GET import_status": POLLED, "POST deployment": FORM_COUNT},
+    },
+}
+
+# Metrics that may grow by --threshold before a run counts as a regression.
+RELATIVE_METRICS = ("wall_time", "peak_memory")
+
+
+# Runs the CLI and writes the peak memory of the process to the file named by
+# BIFROST_BENCH_MEMORY on exit. On Linux the child's ru_maxrss also counts the
+# parent it was forked from, so VmHWM of the exec'd process is read instead.
+CHILD = """
+import atexit, os, resource, runpy, sys
+
+def report():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as status:
+            peak = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+    if sys.platform != "darwin":
+        peak *= 1024
+    with open(os.environ["BIFROST_BENCH_MEMORY"], "w") as f:
+        f.write(str(peak))
+
+atexit.register(report)
+sys.argv[0] = "bifrost"
+runpy.run_module("bifrost_cli.bifrost", run_name="__main__")
+"""
+
+
+def prepare_home(home:str, base_url:str) -> dict:
+    downloads = os.path.join(home, "downloads")
+    forms = os.path.join(home, "forms")
+    os.makedirs(downloads)
+    os.makedirs(forms)
+    for index in range(FORM_COUNT):
+        with open(os.path.join(forms, f"form_{index}.xlsx"), 'wb') as f:
+            f.write(f"form {index}".encode() * 1000)
+    with open(os.path.join(home, ".bifrost_config.json"), 'w') as f:
+        json.dump({"KOBO_API_BASE_URL": base_url, "KOBO_API_KEY": "benchmark", "KOBO_DOWNLOADS": downloads}, f)
+    return {"forms": forms, "form": os.path.join(forms, "form_0.xlsx")}
+
+
+def resolve(value, mock:MockKobo):
+    return value(mock) if callable(value) else value
+
+
+def measure(path:str, unit:str) -> int:
+    if unit == "files":
+        return sum(len(files) for _, _, files in os.walk(path))
+    if unit == "lines":
+        with open(path, 'rb') as f:
+            return sum(1 for _ in f)
+    if unit == "rows":
+        # Data rows of a CSV output, without the header.
+        with (gzip.open if path.endswith(".gz") else open)(path, 'rb') as f:
+            return sum(1 for _ in f) - 1
+    return os.path.getsize(path)
+
+
+def check(routes:dict, files:dict, json_items:int, mock:MockKobo, downloads:str, stdout:str, only_files:bool= False) -> list:
+    # Returns what the run did differently from the scenario's expectations.
+    problems = []
+    for route in sorted(set(routes) | set(mock.route_counts)):
+        got = mock.route_counts.get(route, 0)
+        expected = routes.get(route, 0)
+        if (got not in expected) if isinstance(expected, range) else (got != expected):
+            wanted = f"at least {expected.start}" if isinstance(expected, range) else expected
+            problems.append(f"{route}: {got} requests, expected {wanted}")
+    unmatched = mock.request_count - sum(mock.route_counts.values())
+    if unmatched:
+        problems.append(f"{unmatched} requests to unknown endpoints")
+    for name, (unit, expected) in files.items():
+        path = os.path.join(downloads, name)
+        if not os.path.exists(path):
+            problems.append(f"{name} was not written")
+        elif measure(path, unit) != expected:
+            problems.append(f"{name}: {measure(path, unit)} {unit}, expected {expected}")
+    if only_files:
+        left = {os.path.relpath(os.path.join(root, name), downloads).replace(os.sep, "/")
+                for root, _, names in os.walk(downloads) for name in names}
+        for name in sorted(left - set(files)):
+            problems.append(f"{name} was left in the downloads folder")
+    if json_items is not None:
+        try:
+            items = len(json.loads(stdout))
+        except ValueError:
+            items = None
+        if items != json_items:
+            problems.append(f"output has {items} JSON items, expected {json_items}")
+    return problems
+
+
+def run_once(mock:MockKobo, scenario:dict) -> dict:
+    payload_bytes = mock.payload_bytes
+    mock.payload_bytes = scenario.get("payload_bytes", payload_bytes)
+    try:
+        return _run_once(mock, scenario)
+    finally:
+        mock.payload_bytes = payload_bytes
+
+
+def _run_once(mock:MockKobo, scenario:dict) -> dict:
+    with tempfile.TemporaryDirectory() as home:
+        paths = prepare_home(home, mock.base_url)
+        args = [arg.format(**paths) for arg in scenario["args"]]
+        memory_path = os.path.join(home, "peak_memory")
+        env = dict(os.environ, HOME=home, BIFROST_BENCH_MEMORY=memory_path,
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+        if "setup" in scenario:
+            scenario["setup"](mock)
+        routes = {route: resolve(count, mock) for route, count in scenario.get("routes", {}).items()}
+        files = {name: (unit, resolve(amount, mock)) for name, (unit, amount) in scenario.get("files", {}).items()}
+        json_items = resolve(scenario.get("json_items"), mock)
+        mock.reset_counters()
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", CHILD, *args], env=env, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        wall_time = time.perf_counter() - start
+        output = result.stdout.decode(errors='replace')
+        if result.returncode != 0:
+            raise RuntimeError(f"bifrost {' '.join(args)} exited with {result.returncode}:\n{output}{result.stderr.decode(errors='replace')}")
+        problems = check(routes, files, json_items, mock, os.path.join(home, "downloads"), output, scenario.get("only_files", False))
+        if problems:
+            raise RuntimeError(f"bifrost {' '.join(args)} did not do what the scenario expects:\n  " + "\n  ".join(problems)
+                               + f"\nOutput:\n{output[-2000:]}{result.stderr.decode(errors='replace')[-2000:]}")
+        with open(memory_path, 'r') as f:
+            peak_memory = int(f.read())
+        if peak_memory > scenario.get("max_peak_memory", peak_memory):
+            raise RuntimeError(f"bifrost {' '.join(args)} used {peak_memory / 1e6:.1f}MB, "
+                               f"more than the scenario's bound of {scenario['max_peak_memory'] / 1e6:.1f}MB")
+        return {"wall_time": wall_time, "requests": mock.request_count, "peak_memory": peak_memory}
+
+
+def run_scenario(mock:MockKobo, scenario:dict, repeat:int) -> dict:
+    runs = [run_once(mock, scenario) for _ in range(repeat)]
+    return {
+        "wall_time": statistics.median(run["wall_time"] for run in runs),
+        "requests": max(run["requests"] for run in runs),
+        "peak_memory": max(run["peak_memory"] for run in runs),
+    }
+
+
+def regressions(results:dict, baseline:dict, threshold:float) -> list:
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in RELATIVE_METRICS:
+            if result[metric] > base[metric] * (1 + threshold):
+                found.append(f"{name}: {metric} {base[metric]:.3f} -> {result[metric]:.3f}")
+        if result["requests"] > base["requests"]:
+            found.append(f"{name}: requests {base['requests']} -> {result['requests']}")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every request by the mock server")
+    parser.add_argument("--job-seconds", type=float, default=1.0, help="Seconds imports and exports stay processing")
+    parser.add_argument("--payload-bytes", type=int, default=5_000_000, help="Size of export and asset files")
+    parser.add_argument("--submissions", type=int, default=2000, help="Submissions per asset")
+    parser.add_argument("--attachments", type=int, default=1, help="Attachments per submission")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative increase of wall time and peak memory")
+    opts = parser.parse_args()
+
+    unknown = set(opts.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    names = opts.scenarios or list(SCENARIOS)
+    settings = {key: getattr(opts, key) for key in ("latency", "job_seconds", "payload_bytes", "submissions", "attachments")}
+    baseline = {}
+    if opts.baseline:
+        with open(opts.baseline, 'r') as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        if saved.get("settings", {}) != settings:
+            print(f"Warning: the baseline was recorded with different settings: {saved.get('settings')}")
+
+    results = {}
+    failed = []
+    with MockKobo(submissions=opts.submissions, attachments=opts.attachments, latency=opts.latency,
+                  job_seconds=opts.job_seconds, payload_bytes=opts.payload_bytes) as mock:
+        print(f"{'Scenario':<20}{'Wall':>10}{'Requests':>10}{'Peak RSS':>12}{'vs baseline':>14}")
+        for name in names:
+            try:
+                result = results[name] = run_scenario(mock, SCENARIOS[name], opts.repeat)
+            except RuntimeError as e:
+                print(f"{name:<20}FAILED: {e}")
+                failed.append(name)
+                continue
+            change = ""
+            if name in baseline:
+                change = f"{(result['wall_time'] / baseline[name]['wall_time'] - 1) * 100:+.1f}%"
+            print(f"{name:<20}{result['wall_time']:>9.2f}s{result['requests']:>10}{result['peak_memory'] / 1e6:>10.1f}MB{change:>14}")
+
+    if opts.save:
+        with open(opts.save, 'w') as f:
+            json.dump({"python": platform.python_version(), "settings": settings, "results": results}, f, indent=2)
+        print(f"Results saved to {opts.save}")
+
+    found = regressions(results, baseline, opts.threshold)
+    for regression in found:
+        print(f"Regression: {regression}")
+    if failed:
+        print(f"Failed scenarios: {', '.join(failed)}")
+    return 1 if found or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
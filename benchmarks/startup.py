@@ -0,0 +1,80 @@
+"""Measures how long bifrost takes to start for commands that never touch the network.
+
+Each command runs in a fresh interpreter with a throwaway HOME, so the numbers
+include interpreter start-up and module imports but no real config or cache.
+
+    python benchmarks/startup.py --runs 20 --budget 0.25
+
+Exits non-zero when the median of any command exceeds the budget (seconds) or
+when requests/rich get imported by a command that does not need them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS = (
+    ("--help", ["--help"], ""),
+    ("config view", ["config", "view"], "n\n"),
+)
+
+HEAVY_MODULES = ("requests", "rich", "urllib3", "pyarrow")
+
+# Runs the CLI in-process and reports which heavy modules ended up imported.
+PROBE = """
+import json, sys
+from bifrost_cli.bifrost import cli
+try:
+    cli.main(args=sys.argv[1:], prog_name="bifrost", standalone_mode=False)
+except BaseException:
+    pass
+sys.stderr.write(json.dumps(sorted({name.split('.')[0] for name in sys.modules} & set(%r))))
+""" % (HEAVY_MODULES,)
+
+
+def run(args:list, stdin:str, env:dict) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "bifrost_cli.bifrost", *args], input=stdin, env=env,
+                          capture_output=True, text=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=0.25, help="Maximum median start-up time in seconds")
+    opts = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    failed = False
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=os.pathsep.join(filter(None, [repo_root, os.environ.get("PYTHONPATH")])))
+        for name, args, stdin in COMMANDS:
+            # One untimed run so the bytecode cache is warm.
+            run(args, stdin, env)
+            timings = []
+            for _ in range(opts.runs):
+                start = time.perf_counter()
+                result = run(args, stdin, env)
+                timings.append(time.perf_counter() - start)
+                if result.returncode != 0:
+                    print(f"{name}: exited with {result.returncode}\n{result.stderr}")
+                    return 1
+            probe = subprocess.run([sys.executable, "-c", PROBE, *args], input=stdin, env=env, capture_output=True, text=True)
+            loaded = json.loads(probe.stderr.strip().splitlines()[-1])
+            median = statistics.median(timings)
+            status = "ok"
+            if median > opts.budget:
+                status = f"over budget ({opts.budget:.3f}s)"
+                failed = True
+            if loaded:
+                status = f"imports {', '.join(loaded)}"
+                failed = True
+            print(f"{name:<12} median {median:.3f}s  min {min(timings):.3f}s  max {max(timings):.3f}s  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Union
+
+from bifrost_cli.bifrost import Bifrost, DEFAULT_POOL_SIZE, form_digest, remove_jobs
+
+if TYPE_CHECKING:
+    from bifrost_cli.pipeline import Pipeline
+
+
+class AsyncBifrost:
+    """asyncio front-end for :class:`Bifrost`.
+
+    Every operation of the blocking client is available as a coroutine with the
+    same arguments and return value. HTTP calls run on a worker pool sized to the
+    connection pool, while the waits between import/export status checks are
+    ``asyncio.sleep`` calls, so hundreds of jobs can be polled from one event loop
+    without holding a thread each.
+    """
+
+    def __init__(self, base_url:str, api_key:str, pool_size:int= DEFAULT_POOL_SIZE, **kwargs) -> None:
+        self.client = Bifrost(base_url, api_key, pool_size=pool_size, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="bifrost")
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def _wait_for_completion(self, url:str) -> Union[None,dict]:
+        poller = self.client._job_poller(url)
+        next(poller)
+        try:
+            while True:
+                status_response = await self._run(self.client._check_status, url)
+                await asyncio.sleep(poller.send(status_response))
+        except StopIteration as finished:
+            return finished.value
+
+    async def _import_form(self, url:str, data:dict, file_path:Optional[str]= None, digest:Optional[str]= None) -> Optional[dict]:
+        current_form_import_url = await self._run(self.client._start_import, url=url, data=data, file_path=file_path, digest=digest)
+        if current_form_import_url is None:
+            return None
+        return await self._wait_for_completion(current_form_import_url)
+
+    async def get_all_asset(self, *args, **kwargs) -> None:
+        return await self._run(self.client.get_all_asset, *args, **kwargs)
+
+    async def create_form(self, file_path:Optional[str]= None) -> Optional[str]:
+        import_url = f"{self.client.base_url}imports/"
+        data = {'library': 'false'}
+        print("Starting Form Creation Procedure.......")
+        digest = form_digest(file_path) if file_path else None
+        response = await self._import_form(url=import_url, data=data, file_path=file_path, digest=digest)
+        form_id = self.client._show_created_asset(response)
+        self.client._record_form_hash(form_id, digest)
+        return form_id
+
+    async def update_form(self, form_id:str, file_path:Optional[str]= None) -> Optional[dict]:
+        import_url = f"{self.client.base_url}imports/"
+        data = self.client._update_import_data(form_id)
+        print("Starting Form Update procedure.......")
+        digest = form_digest(file_path) if file_path else None
+        import_response = await self._import_form(url=import_url, data=data, file_path=file_path, digest=digest)
+        self.client._expire_asset(form_id)
+        if import_response is not None:
+            self.client._record_form_hash(form_id, digest)
+        return import_response
+
+    async def deploy_form(self, form_id:str) -> None:
+        return await self._run(self.client.deploy_form, form_id)
+
+    async def redeploy_form(self, form_id:str, skip_current:bool= False) -> None:
+        return await self._run(self.client.redeploy_form, form_id, skip_current=skip_current)
+
+    async def delete_form(self, form_id:str) -> None:
+        return await self._run(self.client.delete_form, form_id)
+
+    async def submission_without_auth(self, form_id:str) -> None:
+        return await self._run(self.client.submission_without_auth, form_id)
+
+    async def clone_premission(self, form_id:str, source_id:str) -> None:
+        return await self._run(self.client.clone_premission, form_id, source_id)
+
+    async def set_permissions(self, form_ids:list, assignments:list, concurrency:int= 8) -> list:
+        return await self._run(self.client.set_permissions, form_ids, assignments, concurrency=concurrency)
+
+    async def clone_permissions(self, source_id:str, form_ids:list, concurrency:int= 8) -> list:
+        return await self._run(self.client.clone_permissions, source_id, form_ids, concurrency=concurrency)
+
+    async def get_asset(self, form_id:str, file_path:str, asset_type:str, progress:bool= True) -> None:
+        return await self._run(self.client.get_asset, form_id, file_path, asset_type, progress=progress)
+
+    async def export_data(self, form_id:str, file_path:str, export_options, progress:bool= True, reuse:bool= True,
+                          snapshot:Optional[dict]= None, pipeline:Optional["Pipeline"]= None) -> Optional[int]:
+        if reuse and snapshot is None:
+            snapshot = await self._run(self.client._export_snapshot, form_id)
+        exp = self.client._reusable_export(form_id, export_options, snapshot) if reuse else None
+        if exp is not None:
+            data_url_res = await self._wait_for_completion(exp)
+            if data_url_res is not None:
+                return await self._run(self.client._collect_export, data_url_res, file_path, progress=progress, pipeline=pipeline)
+            remove_jobs([exp])
+        exp = await self._run(self.client._start_export, form_id, export_options, file_path=file_path, snapshot=snapshot, pipeline=pipeline)
+        if exp is None:
+            return None
+        data_url_res = await self._wait_for_completion(exp)
+        return await self._run(self.client._collect_export, data_url_res, file_path, progress=progress, pipeline=pipeline)
+
+    async def export_batch(self, exports:list, export_options:dict, concurrency:int= 4, reuse:bool= True) -> list:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_export(index:int, form_id:str, file_path:str) -> dict:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    size = await self.export_data(form_id, file_path, export_options, progress=False, reuse=reuse)
+                except Exception as e:
+                    print(f"Export of {form_id} failed: {e}")
+                    size = None
+                return {"index": index, "uid": form_id, "file_path": file_path, "size": size, "elapsed": time.monotonic() - start}
+
+        print(f"Exporting {len(exports)} forms with up to {concurrency} running at once.......")
+        results = await asyncio.gather(*(run_export(index, form_id, file_path) for index, (form_id, file_path) in enumerate(exports)))
+        self.client._show_export_summary(results)
+        return results
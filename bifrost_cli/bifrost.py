@@ -1,24 +1,183 @@
+from __future__ import annotations
 import click
 import json
 import os
-import requests
-from rich.console import Console
-from rich.table import Table
-from typing import Optional, Union
+from urllib.parse import urlencode
+from bifrost_cli.cache import AssetCache, CACHE_FILE, DEFAULT_CACHE_TTL
+from bifrost_cli.profiling import Profiler
+from bifrost_cli import store
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Union
 import time
+import random
 import functools
+import shutil
+import threading
+
+# requests, rich and the thread pool are imported inside the functions that use them,
+# so commands such as "bifrost --help" or "bifrost config view" start without loading them.
+if TYPE_CHECKING:
+    import requests
+    from bifrost_cli.pipeline import Pipeline
 
 CONFIG_FILE = os.path.expanduser('~/.bifrost_config.json')
+FORM_HASHES_FILE = os.path.expanduser('~/.bifrost_form_hashes.json')
+JOBS_FILE = os.path.expanduser('~/.bifrost_jobs.json')
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 120
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_SIZE = 10
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_POLL_MAX_INTERVAL = 15
+DEFAULT_POLL_TIMEOUT = 60 * 60
+PENDING_JOB_STATUSES = ('created', 'processing')
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_SYNC_PAGE_SIZE = 1000
+# Asset fields an export's content depends on; a reused export must match all of them.
+EXPORT_SNAPSHOT_FIELDS = ('deployment__submission_count', 'deployed_version_id', 'date_modified')
+# A full sync is staged next to the store with this suffix until it completes.
+FULL_SYNC_SUFFIX = '.full'
+# Raw exports that still go through the post-processing pipeline are downloaded
+# next to their destination with this suffix.
+EXPORT_STAGING_SUFFIX = '.raw'
+SUBMISSIONS_FILE = 'submissions.ndjson'
+SYNC_STATE_FILE = 'sync_state.json'
+COLUMNAR_DIR = 'columnar'
+ATTACHMENTS_DIR = 'attachments'
+FORMS_MANIFEST_FILE = 'bifrost_forms.json'
+XLSFORM_EXTENSIONS = ('.xlsx', '.xls')
+ASSET_TABLE_FIELDS = ('uid', 'name', 'deployment_status', 'version_id', 'deployed_version_id', 'deployment__submission_count')
+
+_config = None
 
 def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    # The config file is read once per process; save_config keeps the copy current.
+    global _config
+    if _config is None:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                _config = json.load(f)
+        else:
+            _config = {}
+    return dict(_config)
 
 def save_config(config):
+    global _config
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f)
+    _config = dict(config)
+def load_sync_state(store_dir:str) -> dict:
+    state_path = os.path.join(store_dir, SYNC_STATE_FILE)
+    if os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_sync_state(store_dir:str, state:dict) -> None:
+    state_path = os.path.join(store_dir, SYNC_STATE_FILE)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def load_forms_manifest(manifest_path:str) -> dict:
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_forms_manifest(manifest_path:str, manifest:dict) -> None:
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+_form_hashes_lock = threading.Lock()
+
+def load_form_hashes() -> dict:
+    if os.path.exists(FORM_HASHES_FILE):
+        with open(FORM_HASHES_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_form_hash(form_id:str, digest:str) -> None:
+    with _form_hashes_lock:
+        hashes = load_form_hashes()
+        hashes[form_id] = digest
+        tmp_path = f"{FORM_HASHES_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, FORM_HASHES_FILE)
+
+# The job journal maps import/export job URLs to what they were started for, so an
+# interrupted command can pick up the server-side job instead of starting over.
+_jobs_lock = threading.Lock()
+
+def load_jobs() -> dict:
+    if os.path.exists(JOBS_FILE):
+        with open(JOBS_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+def _save_jobs(jobs:dict) -> None:
+    tmp_path = f"{JOBS_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(jobs, f, indent=2)
+    os.replace(tmp_path, JOBS_FILE)
+
+def record_job(url:str, **fields) -> None:
+    with _jobs_lock:
+        jobs = load_jobs()
+        jobs.setdefault(url, {}).update(fields)
+        _save_jobs(jobs)
+
+def finish_job(url:str, status_response:Optional[dict]) -> None:
+    # Completed imports leave the journal; completed exports stay so they can be
+    # reused and replace older exports of the same form with the same options.
+    # Jobs that could not be checked stay pending.
+    status = status_response.get('status') if status_response is not None else None
+    if status not in ("complete", "error"):
+        return
+    with _jobs_lock:
+        jobs = load_jobs()
+        job = jobs.get(url)
+        if job is None:
+            return
+        if status == "error":
+            job["status"] = "failed"
+        elif job.get("kind") == "import":
+            del jobs[url]
+        else:
+            job.update({"status": "complete", "result": status_response.get("result"), "completed_at": time.time()})
+            for other_url, other in list(jobs.items()):
+                if other_url != url and other.get("status") == "complete" and other.get("asset") == job.get("asset") and other.get("options") == job.get("options"):
+                    del jobs[other_url]
+        _save_jobs(jobs)
+
+def remove_jobs(urls) -> None:
+    with _jobs_lock:
+        jobs = load_jobs()
+        for url in urls:
+            jobs.pop(url, None)
+        _save_jobs(jobs)
+
+def file_sha256(file_path:str) -> str:
+    import hashlib
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def form_digest(file_path:str) -> Optional[str]:
+    try:
+        return file_sha256(file_path)
+    except FileNotFoundError:
+        return None
+
 def ensure_config(f):
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
@@ -37,36 +196,183 @@ def ensure_config(f):
     return wrapper
 
 class Bifrost:
-    def __init__(self,base_url:str,api_key:str) -> None:
-        self.base_url = base_url if base_url.endswith("/") else f"${base_url}/"
+    def __init__(self,base_url:str,api_key:str, connect_timeout:float= DEFAULT_CONNECT_TIMEOUT, read_timeout:float= DEFAULT_READ_TIMEOUT,
+                 retries:int= DEFAULT_RETRIES, backoff_factor:float= DEFAULT_BACKOFF_FACTOR, pool_size:int= DEFAULT_POOL_SIZE,
+                 poll_interval:float= DEFAULT_POLL_INTERVAL, poll_max_interval:float= DEFAULT_POLL_MAX_INTERVAL, poll_timeout:float= DEFAULT_POLL_TIMEOUT,
+                 verbose:bool= True, cache:Optional[AssetCache]= None, instrument:Optional[Callable[[dict], None]]= None) -> None:
+        self.base_url = base_url if base_url.endswith("/") else f"{base_url}/"
         self.api_key= api_key
         self.headers = {'Authorization': f'Token {self.api_key}'}
-        
+        self.timeout = (connect_timeout, read_timeout)
+        self.poll_interval = poll_interval
+        self.poll_max_interval = poll_max_interval
+        self.poll_timeout = poll_timeout
+        self.verbose = verbose
+        self.cache = cache
+        # Called with one span dict per HTTP request, job poll and download (see bifrost_cli.profiling).
+        self.instrument = instrument
+        self.session = self._create_session(retries, backoff_factor, pool_size)
+
+    def _create_session(self, retries:int, backoff_factor:float, pool_size:int) -> requests.Session:
+        # Retries cover connection errors and 429/5xx on idempotent methods; POST/PATCH
+        # are only retried when the request never reached the server.
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.flush()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _log(self, message:str) -> None:
+        if self.verbose:
+            print(message)
+
+    def _emit(self, kind:str, url:str, started:float, **fields) -> None:
+        duration = time.monotonic() - started
+        self.instrument({"kind": kind, "url": url, "start": time.time() - duration, "duration": duration, **fields})
+
+    def _record_request(self, method:str, url:str, started:float, response:Optional[requests.Response], stream:bool, error:Optional[str]= None) -> None:
+        # Streamed bodies are not read here; their size is reported by the download span.
+        if response is None:
+            self._emit("request", url, started, method=method, status=None, bytes=0, bytes_sent=0, retries=0, error=error)
+            return
+        retries = getattr(response.raw, "retries", None)
+        self._emit("request", url, started, method=method, status=response.status_code, bytes=0 if stream else len(response.content),
+                   bytes_sent=int(response.request.headers.get("Content-Length") or 0),
+                   retries=len(retries.history) if retries is not None else 0, error=error)
 
     def _make_request(self, method:str, url:str, **kwargs) -> requests.Response:
+        import requests
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.monotonic()
+        response = None
         try:
-           response= requests.request(method=method, url=url, headers=self.headers,**kwargs)
+           response= self.session.request(method=method, url=url, **kwargs)
            response.raise_for_status()
+           if self.instrument is not None:
+               self._record_request(method, url, started, response, kwargs.get("stream", False))
            return response
         except requests.RequestException as e:
             print(f"Error during making {method} request: {e}")
+            if self.instrument is not None:
+                self._record_request(method, url, started, response, kwargs.get("stream", False), error=str(e))
+
+    def _get_json(self, key:str, url:str, params:Optional[dict]= None, max_age:Optional[float]= None):
+        # Serves metadata from the asset cache while it is younger than max_age
+        # (the cache TTL by default); otherwise revalidates it with a conditional GET.
+        entry = self.cache.get(key) if self.cache is not None else None
+        if entry is not None and max_age != 0 and self.cache.is_fresh(entry, max_age):
+            return entry["data"]
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self._make_request("GET", url, params=params, headers=headers)
+        if response is None:
+            return None
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key)
+            return entry["data"]
+        data = response.json()
+        if self.cache is not None:
+            self.cache.put(key, data, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+        return data
+
+    def _expire_asset(self, form_id:str) -> None:
+        if self.cache is not None:
+            self.cache.expire(form_id, prefix="list:")
 
-    def _check_status(self,url:str) -> dict:
-        return self._make_request("GET", url=url).json()
+    def get_asset_metadata(self, form_id:str, max_age:Optional[float]= None) -> Optional[dict]:
+        return self._get_json(form_id, f"{self.base_url}assets/{form_id}/", params={'format': 'json'}, max_age=max_age)
+
+    def _check_status(self,url:str) -> Optional[dict]:
+        response = self._make_request("GET", url=url)
+        return response.json() if response is not None else None
     
-    def _wait_for_completion(self, url:str)-> Union[None,dict]:
-        while True :
-            status_response = self._check_status(url)
-            if status_response['status'] == 'processing':
-                print("Status: still processing. Checking again in a few seconds...")
-                time.sleep(10)
-            elif status_response["status"]=="complete":
-                    print("Status: completed successfully.")
+    def _poll_delays(self):
+        # Exponential backoff with "equal jitter": half of each delay is fixed and the
+        # other half random, so concurrent jobs don't poll the server in lockstep.
+        delay = self.poll_interval
+        while True:
+            yield delay / 2 + random.uniform(0, delay / 2)
+            delay = min(delay * 2, self.poll_max_interval)
+
+    def _job_poller(self, url:str):
+        # Polling state machine shared by the blocking and asyncio clients: it is sent
+        # each status response and yields how long to wait before the next check. The
+        # final job status (or None on failure) is returned through StopIteration.
+        start = time.monotonic()
+        polls = 0
+        last_status = None
+        delays = self._poll_delays()
+        status_response = yield
+        try:
+            while True:
+                polls += 1
+                if status_response is None:
+                    print("Something went wrong while checking the job status!")
+                    return None
+                status = status_response.get('status')
+                elapsed = time.monotonic() - start
+                if status == "complete":
+                    self._log(f"Status: completed successfully in {elapsed:.1f}s after {polls} status checks.")
                     return status_response
-            else:
-                print("Something went wrong!")
-                break
-    def _import_form (self, url:str, data:dict, file_path:Optional[str]= None) -> None:
+                if status == "error":
+                    print(f"Status: failed after {elapsed:.1f}s.")
+                    messages = status_response.get("messages")
+                    if messages:
+                        print(messages)
+                    return None
+                if status not in PENDING_JOB_STATUSES:
+                    print(f"Something went wrong! Unexpected status: {status}")
+                    return None
+                delay = next(delays)
+                if elapsed + delay > self.poll_timeout:
+                    print(f"Status: still {status} after {elapsed:.1f}s. Giving up after {polls} status checks.")
+                    return None
+                if status != last_status:
+                    self._log(f"Status: {status} after {elapsed:.1f}s. Checking again shortly...")
+                    last_status = status
+                status_response = yield delay
+        finally:
+            finish_job(url, status_response)
+            if self.instrument is not None:
+                status = status_response.get('status') if status_response is not None else None
+                self._emit("poll", url, start, method="GET", status=status, polls=polls)
+
+    def _wait_for_completion(self, url:str)-> Union[None,dict]:
+        poller = self._job_poller(url)
+        next(poller)
+        try:
+            while True:
+                time.sleep(poller.send(self._check_status(url)))
+        except StopIteration as finished:
+            return finished.value
+
+    def _start_import(self, url:str, data:dict, file_path:Optional[str]= None, digest:Optional[str]= None) -> Optional[str]:
         if file_path is None:
             raise ValueError("File path is not provided.")
         try:
@@ -74,13 +380,16 @@ class Bifrost:
                 imported_xls_form = {'file': file}
                
                 response = self._make_request("POST", url, data=data, files=imported_xls_form, params={'format': 'json'})
+                if response is None:
+                    return None
 
                 if response.status_code== 201:
                     response_data= response.json()
                     current_form_import_url= response_data["url"]
-                    print(f"Import started. Checking status at: {current_form_import_url}")
-                    import_response= self._wait_for_completion(current_form_import_url)
-                    return import_response
+                    record_job(current_form_import_url, kind="import", asset=data.get("assetUid"), file_path=os.path.abspath(file_path),
+                               digest=digest, status="pending", created_at=time.time())
+                    self._log(f"Import started. Checking status at: {current_form_import_url}")
+                    return current_form_import_url
                 else:
                     print(f"Failed to start import. Status code: {response.status_code}")
                     print(response.text)
@@ -88,14 +397,78 @@ class Bifrost:
         except FileNotFoundError:
             print(f"File not found: {file_path}")
 
-    def get_all_asset(self)-> None:
-        asset_url= f"{self.base_url}assets/"
+    def _import_form (self, url:str, data:dict, file_path:Optional[str]= None, digest:Optional[str]= None) -> Optional[dict]:
+        current_form_import_url = self._start_import(url=url, data=data, file_path=file_path, digest=digest)
+        if current_form_import_url is None:
+            return None
+        return self._wait_for_completion(current_form_import_url)
+
+    def _iter_pages(self, url:str, fetch_page, max_items:Optional[int]= None) -> Iterator[dict]:
+        # Walks the "next" links of a paginated endpoint. The following page is
+        # requested in the background while the current one is being consumed.
+        from concurrent.futures import ThreadPoolExecutor
+        fetched = 0
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(fetch_page, url)
+            while pending is not None:
+                page = pending.result()
+                if page is None:
+                    return
+                fetched += len(page.get("results", []))
+                next_url = page.get("next")
+                pending = None
+                if next_url and (max_items is None or fetched < max_items):
+                    pending = prefetcher.submit(fetch_page, next_url)
+                yield page
+
+    def _get_page(self, url:str) -> Optional[dict]:
+        response = self._make_request("GET", url)
+        return response.json() if response is not None else None
+
+    def _iter_assets(self, page_size:int= DEFAULT_PAGE_SIZE, limit:Optional[int]= None, query:Optional[str]= None,
+                     fields:Optional[list]= None) -> Iterator[dict]:
+        if limit is not None:
+            page_size = min(page_size, limit)
+        params = {'format': 'json', 'limit': page_size}
+        if query:
+            params['q'] = query
+        if fields:
+            params['fields'] = ",".join(fields)
+        yielded = 0
+        for page in self._iter_pages(f"{self.base_url}assets/?{urlencode(params)}", self._get_asset_page, max_items=limit):
+            for asset in page.get("results", []):
+                if fields:
+                    asset = {field: asset.get(field) for field in fields}
+                yield asset
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+
+    def _get_asset_page(self, url:str) -> Optional[dict]:
+        return self._get_json(f"list:{url}", url)
+
+    def get_all_asset(self, page_size:int= DEFAULT_PAGE_SIZE, limit:Optional[int]= None, query:Optional[str]= None,
+                      fields:Optional[list]= None, output:str= "table")-> None:
+        from rich.console import Console
+        from rich.table import Table
+        if output == "json" or output == "ndjson":
+            # Rows are written as they arrive instead of being collected into a table.
+            if output == "json":
+                click.echo("[", nl=False)
+            for index, asset in enumerate(self._iter_assets(page_size=page_size, limit=limit, query=query, fields=fields)):
+                if output == "json":
+                    click.echo(("," if index else "") + json.dumps(asset), nl=False)
+                else:
+                    click.echo(json.dumps(asset))
+            if output == "json":
+                click.echo("]")
+            return
+
         def determine_modification_status(deployed_version_id, version_id):
             if deployed_version_id is None:
                 return "-"
             return "No" if version_id == deployed_version_id else "Yes"
         
-        response= self._make_request("GET", asset_url, params={'format': 'json'})
         table = Table(title="List of Assets")
         table.add_column("SN", justify="right", no_wrap=True)
         table.add_column("Name",overflow="fold")
@@ -103,7 +476,7 @@ class Bifrost:
         table.add_column("Deployment status", justify="right")
         table.add_column("Undeployed Update", justify="right")
         table.add_column("Submission Count", justify="right")
-        for index,asset in enumerate(response.json()["results"]):
+        for index,asset in enumerate(self._iter_assets(page_size=page_size, limit=limit, query=query, fields=list(ASSET_TABLE_FIELDS))):
             modification_status = determine_modification_status(
             asset.get("deployed_version_id"),
             asset.get("version_id"))
@@ -112,12 +485,34 @@ class Bifrost:
         console.print(table)
 
 
+    def form_unchanged(self, form_id:str, file_path:str) -> bool:
+        # True when file_path has the same content as the last file imported into form_id.
+        digest = form_digest(file_path)
+        return digest is not None and load_form_hashes().get(form_id) == digest
+
+    def _record_form_hash(self, form_id:Optional[str], digest:Optional[str]) -> None:
+        # digest is taken before the upload, so edits made while the import runs
+        # are picked up by the next one.
+        if form_id and digest:
+            save_form_hash(form_id, digest)
+
     def create_form(self, file_path:Optional[str]= None)->None:
         import_url= self.base_url +"imports/"
         data = {'library': 'false'}
         print("Starting Form Creation Procedure.......")
-        response= self._import_form(url=import_url, data=data,file_path=file_path)
-        res= response["messages"]["created"][0]
+        digest = form_digest(file_path) if file_path else None
+        response= self._import_form(url=import_url, data=data,file_path=file_path, digest=digest)
+        form_id = self._show_created_asset(response)
+        self._record_form_hash(form_id, digest)
+        return form_id
+
+    def _show_created_asset(self, import_response:Optional[dict]) -> Optional[str]:
+        from rich.console import Console
+        from rich.table import Table
+        if import_response is None:
+            print("Form creation failed!")
+            return None
+        res= import_response["messages"]["created"][0]
         table = Table(title="Information of created asset")
         table.add_column("SN", justify="right", no_wrap=True)
         table.add_column("AssetID", justify="right",overflow="fold")
@@ -129,26 +524,55 @@ class Bifrost:
         return res["uid"]
         
 
-    def update_form(self, form_id:str,  file_path:Optional[str]= None)-> None:
-        import_url = f"{self.base_url}imports/"
+    def _update_import_data(self, form_id:str) -> dict:
         form_asset_url = f"{self.base_url}assets/{form_id}/"
-        data = {'library': 'false', 'destination': form_asset_url, 'assetUid': form_id}
+        return {'library': 'false', 'destination': form_asset_url, 'assetUid': form_id}
+
+    def update_form(self, form_id:str,  file_path:Optional[str]= None)-> Optional[dict]:
+        import_url = f"{self.base_url}imports/"
+        data = self._update_import_data(form_id)
         print("Starting Form Update procedure.......")
-        self._import_form(url=import_url, data=data, file_path=file_path)
+        digest = form_digest(file_path) if file_path else None
+        import_response = self._import_form(url=import_url, data=data, file_path=file_path, digest=digest)
+        self._expire_asset(form_id)
+        if import_response is not None:
+            self._record_form_hash(form_id, digest)
+        return import_response
         
 
-    def deploy_form(self, form_id:str):
+    def _deploy(self, form_id:str) -> Optional[dict]:
         deployment_url = f"{self.base_url}assets/{form_id}/deployment/"
         deployment_data= {
             "active": True
         }
-        print("Starting Form Deployment procedure.......")
         response = self._make_request("POST", deployment_url, data=deployment_data,params={'format': 'json'})
+        self._expire_asset(form_id)
+        return response.json() if response is not None else None
 
-        if type(response) == type(None):
+    def _redeploy(self, form_id:str, version_id:str) -> Optional[dict]:
+        deployment_url = f"{self.base_url}assets/{form_id}/deployment/"
+        deployment_data = {
+            'version_id': version_id,
+            "active": True
+        }
+        response = self._make_request("PATCH", deployment_url, data=deployment_data, params={'format': 'json'})
+        self._expire_asset(form_id)
+        return response.json() if response is not None else None
+
+    def deploy_form(self, form_id:str):
+        from rich.console import Console
+        from rich.table import Table
+        print("Starting Form Deployment procedure.......")
+        # A deployment can be archived but never removed, so a cached has_deployment
+        # flag is trustworthy regardless of its age.
+        cached = self.cache.get(form_id) if self.cache is not None else None
+        if cached is not None and cached["data"].get("has_deployment"):
+            print("Error: The form has already been deployed. Use redeploy to deploy a new version.")
+            return
+        res = self._deploy(form_id)
+        if type(res) == type(None):
             print("Error: The form cannot be deployed because it may have been deployed already. Please check the deployment status of the form and ensure it is not deployed previously before attempting to deploy.")
             return
-        res= response.json()
         table = Table(title="Deployment Details")
         table.add_column("SN", justify="right", overflow="fold")
         table.add_column("Asset ID", justify="right",overflow="fold")
@@ -159,26 +583,26 @@ class Bifrost:
         console = Console()
         console.print(table)
     
-    def redeploy_form (self, form_id:str):
-        form_asset_url = f"{self.base_url}assets/{form_id}/"
-        deployment_url = f"{self.base_url}assets/{form_id}/deployment/"
+    def redeploy_form (self, form_id:str, skip_current:bool= False):
+        from rich.console import Console
+        from rich.table import Table
         print("Starting Form Re-deployment procedure......")
-        response = self._make_request("GET", form_asset_url, params={'format': 'json'})
-        version_to_deploy = response.json()['version_id']
-        
-        deployment_data = {
-            'version_id': version_to_deploy,
-            "active": True
-        }
+        # Always revalidate: the form may have just been updated. An unchanged asset
+        # costs a 304 instead of the full asset JSON.
+        asset_metadata = self.get_asset_metadata(form_id, max_age=0)
+        if asset_metadata is None:
+            return
+        version_to_deploy = asset_metadata['version_id']
+        if skip_current and asset_metadata.get("deployed_version_id") == version_to_deploy:
+            print("The latest version of the form is already deployed. Skipping redeploy.")
+            return
         
-        response = self._make_request("PATCH", deployment_url, data=deployment_data, params={'format': 'json'})
-        if type(response) == type(None):
+        res = self._redeploy(form_id, version_to_deploy)
+        if type(res) == type(None):
             print("Error: The form cannot be redeployed because it may not have been deployed yet. Please check the deployment status of the form and ensure it is deployed before attempting to redeploy.")
             return
-        if response.status_code == 200:
-            print("Successfully Re-deployed form")
+        print("Successfully Re-deployed form")
             
-        res= response.json()
         table = Table(title="Re-deployment Details")
         table.add_column("SN", justify="right",overflow="fold")
         table.add_column("Asset ID", justify="right",overflow="fold")
@@ -195,67 +619,912 @@ class Bifrost:
         form_asset_url = f"{self.base_url}assets/{form_id}/"
         print("Starting Form Deletion Procedure.......")
         self._make_request("DELETE", form_asset_url)
+        self._expire_asset(form_id)
         print("Succssfully Deleted Form")
 
-    def submission_without_auth (self,form_id:str)->None:
+    def permission_assignment(self, username:str, codename:str) -> dict:
+        return {"user": f"{self.base_url}users/{username}/", "permission": f"{self.base_url}permissions/{codename}/"}
+
+    def _assign_permissions(self, form_id:str, assignments:list) -> str:
+        # A single assignment is one POST. Several go through the bulk endpoint, which
+        # replaces the asset's assignments, so they are merged with the current ones
+        # and nothing is sent when all of them are already in place. The owner's
+        # implicit assignments are listed too but cannot be assigned explicitly, so
+        # they are left out of the bulk request.
         premission_url= f"{self.base_url}assets/{form_id}/permission-assignments/"
-        premission={"user":"https://eu.kobotoolbox.org/api/v2/users/AnonymousUser/",
-                    "permission":"https://eu.kobotoolbox.org/api/v2/permissions/add_submissions/"}
-        response= self._make_request("POST", url=premission_url, data=premission)
-        if response.status_code == 201:
+        if len(assignments) == 1:
+            response = self._make_request("POST", url=premission_url, data=assignments[0])
+            return "updated" if response is not None else "failed"
+        asset_metadata = self.get_asset_metadata(form_id)
+        if asset_metadata is None:
+            return "failed"
+        owner = asset_metadata.get("owner__username")
+
+        def is_owner(assignment:dict) -> bool:
+            return assignment["user"].rstrip("/").rsplit("/", 1)[-1] == owner
+
+        response = self._make_request("GET", url=premission_url, params={'format': 'json'})
+        if response is None:
+            return "failed"
+        current = [{key: value for key, value in assignment.items() if key in ("user", "permission", "partial_permissions")}
+                   for assignment in response.json()]
+        existing = {(assignment["user"], assignment["permission"]) for assignment in current}
+        missing = [assignment for assignment in assignments
+                   if (assignment["user"], assignment["permission"]) not in existing and not is_owner(assignment)]
+        if not missing:
+            return "unchanged"
+        current = [assignment for assignment in current if not is_owner(assignment)]
+        response = self._make_request("POST", url=f"{premission_url}bulk/", json=current + missing, params={'format': 'json'})
+        return "updated" if response is not None else "failed"
+
+    def submission_without_auth (self,form_id:str)->None:
+        premission = self.permission_assignment("AnonymousUser", "add_submissions")
+        if self._assign_permissions(form_id, [premission]) == "updated":
             print("Successfuly updated premission to submit data without auth")
     
     def clone_premission(self, form_id:str, source_id:str) -> None:
+        if self._clone_permissions(form_id, source_id) == "updated":
+            print(f"Successfuly cloned premission from \n source_asset_id: {source_id}")
+
+    def _clone_permissions(self, form_id:str, source_id:str) -> str:
         clone_premission_url= f"{self.base_url}assets/{form_id}/permission-assignments/clone/"
         cloned_premissions={"clone_from": source_id}
         response= self._make_request("PATCH", url=clone_premission_url, data=cloned_premissions)
-        if response.status_code == 200:
-            print(f"Successfuly cloned premission from \n source_asset_id: {source_id}")
+        return "updated" if response is not None else "failed"
+
+    def resolve_assets(self, form_ids:tuple= (), query:Optional[str]= None) -> list:
+        # The given UIDs followed by those matching the asset list filter, without duplicates.
+        resolved = list(form_ids)
+        if query:
+            resolved.extend(asset["uid"] for asset in self._iter_assets(query=query, fields=["uid"]))
+        return list(dict.fromkeys(resolved))
+
+    def set_permissions(self, form_ids:list, assignments:list, concurrency:int= 8) -> list:
+        return self._update_permissions(form_ids, lambda form_id: self._assign_permissions(form_id, assignments), concurrency, "Permission Summary")
+
+    def clone_permissions(self, source_id:str, form_ids:list, concurrency:int= 8) -> list:
+        return self._update_permissions(form_ids, lambda form_id: self._clone_permissions(form_id, source_id), concurrency, "Permission Clone Summary")
+
+    def _update_permissions(self, form_ids:list, update, concurrency:int, title:str) -> list:
+        from rich.console import Console
+        from rich.table import Table
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        def run_update(index:int, form_id:str) -> dict:
+            start = time.monotonic()
+            try:
+                status = update(form_id)
+            except Exception as e:
+                print(f"Updating permissions of {form_id} failed: {e}")
+                status = "failed"
+            return {"index": index, "uid": form_id, "status": status, "elapsed": time.monotonic() - start}
+
+        print(f"Updating permissions of {len(form_ids)} forms with up to {concurrency} at once.......")
+        results = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(run_update, index, form_id) for index, form_id in enumerate(form_ids)]
+            for future in as_completed(futures):
+                result = future.result()
+                print(f"{result['uid']}: permissions {result['status']} ({result['elapsed']:.1f}s)")
+                results.append(result)
+        results.sort(key=lambda result: result["index"])
+
+        table = Table(title=title)
+        table.add_column("SN", justify="right", no_wrap=True)
+        table.add_column("AssetID", justify="right", overflow="fold")
+        table.add_column("Status", justify="right")
+        table.add_column("Elapsed", justify="right")
+        for result in results:
+            table.add_row(f"{result['index']+1}", result["uid"], result["status"], f"{result['elapsed']:.1f}s")
+        console = Console()
+        console.print(table)
+        return results
         
-    def get_asset(self,form_id:str,file_path:str, asset_type:str) ->None:
+    def _download_file(self, url:str, file_path:str, params:Optional[dict]= None, progress:bool= True, attempts:int= 3) -> Optional[int]:
+        import requests
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._stream_download(url, file_path, params=params, progress=progress)
+            except requests.RequestException as e:
+                if attempt == attempts:
+                    raise
+                print(f"Download interrupted: {e}. Resuming ({attempt}/{attempts - 1})...")
+
+    def _stream_download(self, url:str, file_path:str, params:Optional[dict]= None, progress:bool= True) -> Optional[int]:
+        # Stream into "<file_path>.part" and rename once complete. The sidecar
+        # "<file_path>.part.json" remembers the url and validator (ETag/Last-Modified)
+        # so an interrupted download is resumed with a Range request. Without a
+        # validator the file may have changed in between, so it starts over.
+        from rich.progress import Progress, TextColumn, BarColumn, DownloadColumn, TransferSpeedColumn, TimeRemainingColumn
+        started = time.monotonic()
+        part_path = f"{file_path}.part"
+        meta_path = f"{part_path}.json"
+        resume_from = 0
+        # Byte ranges only line up with the stored file when no content-encoding is applied.
+        headers = {"Accept-Encoding": "identity"}
+        if os.path.exists(part_path) and os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta.get("url") == url and meta.get("validator"):
+                resume_from = os.path.getsize(part_path)
+        if resume_from:
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = meta["validator"]
+
+        response = self._make_request("GET", url, params=params, headers=headers, stream=True)
+        if response is None and resume_from:
+            print("Could not resume the partial download. Starting again from scratch...")
+            resume_from = 0
+            headers = {"Accept-Encoding": "identity"}
+            response = self._make_request("GET", url, params=params, headers=headers, stream=True)
+        if response is None:
+            return None
+
+        with response:
+            if response.status_code == 206:
+                self._log(f"Resuming download from {resume_from} bytes.")
+                mode = "ab"
+            else:
+                resume_from = 0
+                mode = "wb"
+                with open(meta_path, 'w') as f:
+                    json.dump({"url": url, "validator": response.headers.get("ETag") or response.headers.get("Last-Modified")}, f)
+            content_length = response.headers.get("Content-Length")
+            total = resume_from + int(content_length) if content_length else None
+            written = resume_from
+            with open(part_path, mode) as file, Progress(
+                TextColumn("[bold blue]{task.description}"),
+                BarColumn(),
+                DownloadColumn(),
+                TransferSpeedColumn(),
+                TimeRemainingColumn(),
+                disable=not progress,
+            ) as progress_bar:
+                task = progress_bar.add_task(os.path.basename(file_path), total=total, completed=resume_from)
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+                    written += len(chunk)
+                    progress_bar.update(task, advance=len(chunk))
+            if self.instrument is not None:
+                self._emit("download", url, started, method="GET", status=response.status_code, bytes=written - resume_from, resumed_from=resume_from)
+
+        if total is not None and written != total:
+            print(f"Download interrupted after {written} of {total} bytes. Run the command again to resume.")
+            return None
+        os.replace(part_path, file_path)
+        os.remove(meta_path)
+        return written
+
+    def get_asset(self,form_id:str,file_path:str, asset_type:str, progress:bool= True) ->None:
+        import requests
         asset_download_url=f"{self.base_url}assets/{form_id}.{asset_type}/"
-        response= self._make_request(method="GET", url=asset_download_url,params={'format': 'json'} )
-        if response.status_code == 200:
-             with open(file_path, "wb") as file:
-                file.write(response.content)
-                print(f"File downloaded successfully and saved to {file_path}.")
+        try:
+            size = self._download_file(asset_download_url, file_path, params={'format': 'json'}, progress=progress)
+        except requests.RequestException as e:
+            print(f"Download interrupted: {e}. Run the command again to resume.")
+            return
+        if size is not None:
+            self._log(f"File downloaded successfully and saved to {file_path}.")
         else:
-                print(f"Failed to download file. Status code: {response.status_code}")
-        
-    
-    def export_data(self, form_id:str, file_path:str, export_options)-> None:
+            print("Failed to download file.")
+
+    def _export_snapshot(self, form_id:str) -> Optional[dict]:
+        # What an export's content depends on besides its options: the submissions and
+        # the deployed form version, whose questions become the columns.
+        asset_metadata = self.get_asset_metadata(form_id, max_age=0)
+        if asset_metadata is None:
+            return None
+        return {field: asset_metadata.get(field) for field in EXPORT_SNAPSHOT_FIELDS}
+
+    def _reusable_export(self, form_id:str, export_options:dict, snapshot:Optional[dict]) -> Optional[str]:
+        # A journaled export of the same form with identical options is reused, whether
+        # it is still running or complete, as long as no submissions arrived and the
+        # form was not redeployed or edited since it was started.
+        if snapshot is None:
+            return None
+        candidates = [(job.get("created_at", 0), url) for url, job in load_jobs().items()
+                      if job.get("kind") == "export" and job.get("asset") == form_id and job.get("options") == export_options
+                      and job.get("status") in ("pending", "complete") and job.get("snapshot") == snapshot]
+        return max(candidates)[1] if candidates else None
+
+    def _start_export(self, form_id:str, export_options:dict, file_path:Optional[str]= None, snapshot:Optional[dict]= None,
+                      pipeline:Optional[Pipeline]= None) -> Optional[str]:
         exports_url= f"{self.base_url}assets/{form_id}/exports/"
         response= self._make_request(method="POST", url=exports_url, data= export_options,params={'format': 'json'} )
         if type(response) == type(None):
             print("Somthing went Wrong! Try again....")
-            return
-        exp= response.json()["url"]
-        data_url_res= self._wait_for_completion(url=exp)
+            return None
+        export_url = response.json()["url"]
+        # The pipeline is journaled too, so a resumed export is still post-processed.
+        record_job(export_url, kind="export", asset=form_id, options=export_options, snapshot=snapshot,
+                   file_path=os.path.abspath(file_path) if file_path else None, status="pending", created_at=time.time(),
+                   pipeline=pipeline.options() if pipeline is not None else None)
+        return export_url
+
+    def _save_export(self, data_url_res:Optional[dict], file_path:str, progress:bool= True) -> Optional[int]:
+        import requests
         if type(data_url_res) == type(None):
             print("Somthing went Wrong! Try again....")
+            return None
+        try:
+            size = self._download_file(data_url_res["result"], file_path, progress=progress)
+        except requests.RequestException as e:
+            print(f"Download interrupted: {e}. Run the command again to resume.")
+            return None
+        if size is not None:
+            self._log(f"File downloaded successfully and saved to {file_path}.")
+        else:
+            print("Failed to download file.")
+        return size
+
+    def _collect_export(self, data_url_res:Optional[dict], file_path:str, progress:bool= True, pipeline:Optional[Pipeline]= None) -> Optional[int]:
+        # Without a pipeline the export is downloaded to file_path. With one it is staged
+        # at "<file_path>.raw" and only the processed outputs are published, so None is
+        # also returned when post-processing fails.
+        if pipeline is None:
+            return self._save_export(data_url_res, file_path, progress=progress)
+        staging_path = f"{file_path}{EXPORT_STAGING_SUFFIX}"
+        size = self._save_export(data_url_res, staging_path, progress=progress)
+        if size is None or self.process_export(pipeline, staging_path, file_path) is None:
+            return None
+        return size
+
+    def export_data(self, form_id:str, file_path:str, export_options, progress:bool= True, reuse:bool= True,
+                    snapshot:Optional[dict]= None, pipeline:Optional[Pipeline]= None)-> Optional[int]:
+        # The snapshot only matters for reuse; fresh exports skip the asset GET and are
+        # journaled without one, so they are never reused.
+        if reuse and snapshot is None:
+            snapshot = self._export_snapshot(form_id)
+        exp = self._reusable_export(form_id, export_options, snapshot) if reuse else None
+        if exp is not None:
+            self._log(f"Reusing export with identical options of an unchanged form: {exp}")
+            data_url_res = self._wait_for_completion(url=exp)
+            if data_url_res is not None:
+                return self._collect_export(data_url_res, file_path, progress=progress, pipeline=pipeline)
+            remove_jobs([exp])
+            print("The previous export is no longer available. Starting a new one...")
+        exp= self._start_export(form_id, export_options, file_path=file_path, snapshot=snapshot, pipeline=pipeline)
+        if exp is None:
+            return None
+        data_url_res= self._wait_for_completion(url=exp)
+        return self._collect_export(data_url_res, file_path, progress=progress, pipeline=pipeline)
+
+    def process_export(self, pipeline:Pipeline, staging_path:str, file_path:str) -> Optional[list]:
+        # The pipeline reads the raw export at staging_path and publishes the outputs
+        # named after file_path, each renamed into place once complete, so the raw file
+        # never appears there.
+        import csv
+        start = time.monotonic()
+        try:
+            written = pipeline.run(staging_path, file_path)
+        except (csv.Error, ValueError, RuntimeError, OSError) as e:
+            print(f"Post-processing of {file_path} failed: {e}")
+            return None
+        for path, rows in written:
+            print(f"Wrote {rows} rows to {path}")
+        self._log(f"Post-processing took {time.monotonic() - start:.1f}s")
+        return written
+
+    def watch_export(self, form_id:str, file_path:str, export_options:dict, interval:float= 300, pipeline:Optional[Pipeline]= None) -> None:
+        # Checks the form's submission count and deployed version every interval and
+        # only regenerates and downloads the export when they changed. With the asset
+        # cache an idle form costs one conditional GET per interval. Downloads go to
+        # "<file_path>.part" and are renamed over the previous file, so readers never
+        # see a partial export. With a pipeline the raw export is staged and only the
+        # processed outputs are published.
+        last_snapshot = None
+        print(f"Watching {form_id} every {interval:g}s. Press Ctrl+C to stop.")
+        try:
+            while True:
+                snapshot = self._export_snapshot(form_id)
+                if snapshot is None:
+                    print(f"[{time.strftime('%H:%M:%S')}] Could not read the submission count. Retrying in {interval:g}s.")
+                elif snapshot != last_snapshot:
+                    print(f"[{time.strftime('%H:%M:%S')}] {snapshot['deployment__submission_count']} submissions. Refreshing {file_path}.......")
+                    size = self.export_data(form_id, file_path, export_options, progress=False, snapshot=snapshot, pipeline=pipeline)
+                    if size is not None:
+                        last_snapshot = snapshot
+                if self.cache is not None:
+                    self.cache.flush()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+
+    def export_batch(self, exports:list, export_options:dict, concurrency:int= 4, reuse:bool= True) -> list:
+        # Every export runs its own create/poll/download cycle in a worker thread, so
+        # the server builds the exports in parallel while they share one session.
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        def run_export(index:int, form_id:str, file_path:str) -> dict:
+            start = time.monotonic()
+            try:
+                size = self.export_data(form_id=form_id, file_path=file_path, export_options=export_options, progress=False, reuse=reuse)
+            except Exception as e:
+                print(f"Export of {form_id} failed: {e}")
+                size = None
+            return {"index": index, "uid": form_id, "file_path": file_path, "size": size, "elapsed": time.monotonic() - start}
+
+        print(f"Exporting {len(exports)} forms with up to {concurrency} running at once.......")
+        results = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(run_export, index, form_id, file_path) for index, (form_id, file_path) in enumerate(exports)]
+            for future in as_completed(futures):
+                result = future.result()
+                status = "completed" if result["size"] is not None else "failed"
+                print(f"{result['uid']}: export {status} in {result['elapsed']:.1f}s")
+                results.append(result)
+
+        results.sort(key=lambda result: result["index"])
+        self._show_export_summary(results)
+        return results
+
+    def _show_export_summary(self, results:list) -> None:
+        from rich.console import Console
+        from rich.table import Table
+        from rich.filesize import decimal
+        table = Table(title="Export Summary")
+        table.add_column("SN", justify="right", no_wrap=True)
+        table.add_column("AssetID", justify="right", overflow="fold")
+        table.add_column("Status", justify="right")
+        table.add_column("Size", justify="right")
+        table.add_column("Elapsed", justify="right")
+        table.add_column("File", overflow="fold")
+        for result in results:
+            succeeded = result["size"] is not None
+            table.add_row(f"{result['index']+1}", result["uid"], "completed" if succeeded else "failed",
+                          decimal(result["size"]) if succeeded else "-", f"{result['elapsed']:.1f}s", result["file_path"])
+        console = Console()
+        console.print(table)
+
+    def _iter_new_submissions(self, form_id:str, last_id:int, page_size:int= DEFAULT_SYNC_PAGE_SIZE) -> Iterator[Optional[list]]:
+        # Yields the records of every page, then None if a page could not be fetched.
+        failed = []
+        def fetch_page(url:str) -> Optional[dict]:
+            page = self._get_page(url)
+            if page is None:
+                failed.append(url)
+            return page
+
+        params = {
+            'format': 'json',
+            'limit': page_size,
+            'query': json.dumps({"_id": {"$gt": last_id}}),
+            'sort': json.dumps({"_id": 1}),
+        }
+        data_url = f"{self.base_url}assets/{form_id}/data/?{urlencode(params)}"
+        for page in self._iter_pages(data_url, fetch_page):
+            yield page.get("results", [])
+        if failed:
+            yield None
+
+    def sync_submissions(self, form_id:str, store_dir:str, page_size:int= DEFAULT_SYNC_PAGE_SIZE, full:bool= False) -> Optional[int]:
+        # Only submissions whose _id is above the stored watermark are requested and
+        # appended to "<store_dir>/submissions.ndjson". The state file is rewritten
+        # after every page together with the store size, so an interrupted sync is
+        # trimmed back to the last recorded page and resumed from there. A full sync
+        # is written to "<store>.full" instead and only replaces the store and state
+        # once every page arrived. When a page cannot be fetched the store and state
+        # are left as they were and None is returned.
+        os.makedirs(store_dir, exist_ok=True)
+        store_path = os.path.join(store_dir, SUBMISSIONS_FILE)
+        full_path = f"{store_path}{FULL_SYNC_SUFFIX}"
+        write_path = full_path if full else store_path
+        state = {} if full else load_sync_state(store_dir)
+        if full or not os.path.exists(store_path):
+            state = {}
+            open(write_path, 'wb').close()
+        store_bytes = state.get("store_bytes", 0)
+        if os.path.getsize(write_path) > store_bytes:
+            with open(write_path, 'r+b') as store:
+                store.truncate(store_bytes)
+        last_id = state.get("last_id", 0)
+        initial_state = dict(state)
+        print(f"Syncing submissions of {form_id} newer than _id {last_id}.......")
+
+        start = time.monotonic()
+        new_records = 0
+        failed = False
+        try:
+            with open(write_path, 'ab') as store:
+                for records in self._iter_new_submissions(form_id, last_id, page_size=page_size):
+                    if records is None:
+                        failed = True
+                        break
+                    if not records:
+                        continue
+                    store.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+                    store.flush()
+                    new_records += len(records)
+                    last_record = records[-1]
+                    state.update({
+                        "last_id": last_record["_id"],
+                        "last_submission_time": last_record.get("_submission_time"),
+                        "count": state.get("count", 0) + len(records),
+                        "store_bytes": store.tell(),
+                    })
+                    # The state of a full sync only describes the staged file until it replaces the store.
+                    if not full:
+                        save_sync_state(store_dir, state)
+        except BaseException:
+            if full and os.path.exists(full_path):
+                os.remove(full_path)
+            raise
+        if failed:
+            if full:
+                os.remove(full_path)
+            else:
+                with open(store_path, 'r+b') as store:
+                    store.truncate(store_bytes)
+                save_sync_state(store_dir, initial_state)
+            print("Failed to fetch a page of submissions. The sync was rolled back; run the command again to retry.")
+            return None
+        state["synced_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        if full:
+            os.replace(full_path, store_path)
+        save_sync_state(store_dir, state)
+        print(f"Synced {new_records} new submissions in {time.monotonic() - start:.1f}s. "
+              f"{state.get('count', 0)} submissions stored in {store_path}.")
+        return new_records
+
+    def _iter_attachments(self, form_id:str, page_size:int= DEFAULT_SYNC_PAGE_SIZE) -> Iterator[tuple]:
+        params = {'format': 'json', 'limit': page_size, 'fields': json.dumps(["_id", "_attachments"])}
+        data_url = f"{self.base_url}assets/{form_id}/data/?{urlencode(params)}"
+        for page in self._iter_pages(data_url, self._get_page):
+            for submission in page.get("results", []):
+                for attachment in submission.get("_attachments") or []:
+                    yield submission["_id"], attachment
+
+    def _remote_size(self, url:str) -> Optional[int]:
+        response = self._make_request("HEAD", url, allow_redirects=True)
+        if response is None or response.headers.get("Content-Length") is None:
+            return None
+        return int(response.headers["Content-Length"])
+
+    def download_attachments(self, form_id:str, out_dir:str, concurrency:int= 8, verify:bool= False) -> dict:
+        # Attachments are saved as "<out_dir>/<submission _id>/<file name>". Completed
+        # files are only ever created by an atomic rename, so an existing file is
+        # skipped (or, with verify, compared against the server's Content-Length);
+        # interrupted ones are resumed from their ".part" file.
+        import requests
+        from rich.console import Console
+        from rich.table import Table
+        from rich.progress import Progress, TextColumn, DownloadColumn, TransferSpeedColumn
+        from rich.filesize import decimal
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        def fetch(submission_id, attachment:dict) -> tuple:
+            url = attachment.get("download_url")
+            file_name = os.path.basename(attachment.get("filename") or "") or f"{attachment.get('id')}"
+            file_path = os.path.join(out_dir, str(submission_id), file_name)
+            if os.path.exists(file_path):
+                if not verify or self._remote_size(url) in (None, os.path.getsize(file_path)):
+                    return "skipped", 0
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            try:
+                size = self._download_file(url, file_path, progress=False)
+            except requests.RequestException as e:
+                print(f"Failed to download {url}: {e}")
+                size = None
+            return ("downloaded", size) if size is not None else ("failed", 0)
+
+        print(f"Downloading attachments of {form_id} with up to {concurrency} at once.......")
+        counts = {"downloaded": 0, "skipped": 0, "failed": 0}
+        total_bytes = 0
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, Progress(
+            TextColumn("[bold blue]{task.description}"),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            disable=not self.verbose,
+        ) as progress_bar:
+            task = progress_bar.add_task("0 files", total=None)
+            futures = [executor.submit(fetch, submission_id, attachment) for submission_id, attachment in self._iter_attachments(form_id)]
+            for future in as_completed(futures):
+                outcome, size = future.result()
+                counts[outcome] += 1
+                total_bytes += size
+                progress_bar.update(task, advance=size, description=f"{sum(counts.values())} files")
+        elapsed = time.monotonic() - start
+
+        table = Table(title="Attachment Download Summary")
+        table.add_column("Downloaded", justify="right")
+        table.add_column("Skipped", justify="right")
+        table.add_column("Failed", justify="right")
+        table.add_column("Size", justify="right")
+        table.add_column("Elapsed", justify="right")
+        table.add_column("Throughput", justify="right")
+        table.add_row(f"{counts['downloaded']}", f"{counts['skipped']}", f"{counts['failed']}", decimal(total_bytes),
+                      f"{elapsed:.1f}s", f"{decimal(int(total_bytes / elapsed)) if elapsed else '-'}/s")
+        console = Console()
+        console.print(table)
+        return {**counts, "bytes": total_bytes, "elapsed": elapsed}
+
+    def build_columnar_store(self, form_id:str, store_dir:str, fmt:str= "parquet") -> Optional[int]:
+        # Converts the synced NDJSON store into "<store_dir>/columnar/", partitioned
+        # by submission date, with column types taken from the form definition.
+        # Only records appended since the last conversion are read; a changed form
+        # definition or format rebuilds the whole dataset.
+        store.require_pyarrow()
+        state = load_sync_state(store_dir)
+        asset_metadata = self.get_asset_metadata(form_id)
+        if asset_metadata is None:
+            print("Could not fetch the form definition.")
+            return None
+        columns = store.columns_from_asset(asset_metadata)
+        out_dir = os.path.join(store_dir, COLUMNAR_DIR)
+        columnar = state.get("columnar", {})
+        if columnar.get("format") != fmt or columnar.get("columns") != [list(column) for column in columns]:
+            if os.path.isdir(out_dir):
+                shutil.rmtree(out_dir)
+            columnar = {"format": fmt, "columns": [list(column) for column in columns], "offset": 0}
+        start = time.monotonic()
+        written, offset = store.write_columnar(os.path.join(store_dir, SUBMISSIONS_FILE), out_dir, columns,
+                                               start_offset=columnar["offset"], end_offset=state.get("store_bytes", 0), fmt=fmt)
+        columnar["offset"] = offset
+        state["columnar"] = columnar
+        save_sync_state(store_dir, state)
+        print(f"Wrote {written} submissions to the {fmt} store in {time.monotonic() - start:.1f}s: {out_dir}")
+        return written
+
+    def sync_forms(self, form_dir:str, manifest_path:str, deploy:bool= False, concurrency:int= 4, force:bool= False) -> list:
+        # Each XLSForm in form_dir is imported into the asset its manifest entry points
+        # to, or into a new asset whose UID is written back to the manifest. All imports
+        # are uploaded first (up to concurrency at once) and then polled together, each
+        # on its own backoff schedule from _job_poller, and every form is (re)deployed as
+        # soon as its own import completes rather than after the whole batch.
+        import heapq
+        from rich.console import Console
+        from rich.table import Table
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        manifest = load_forms_manifest(manifest_path)
+        manifest_lock = threading.Lock()
+        file_names = sorted(name for name in os.listdir(form_dir) if name.lower().endswith(XLSFORM_EXTENSIONS) and not name.startswith("~$"))
+        import_url = f"{self.base_url}imports/"
+
+        def start_form(result:dict) -> Optional[str]:
+            form_id = result["uid"]
+            data = self._update_import_data(form_id) if form_id else {'library': 'false'}
+            return self._start_import(url=import_url, data=data, file_path=result["file_path"], digest=result["digest"])
+
+        def deploy_form(result:dict) -> dict:
+            # Whether a form needs (re)deploying is read from the server rather than
+            # the hash, so a failed or skipped deployment is retried on the next run.
+            form_id = result["uid"]
+            if result["import"] == "created":
+                deployed = self._deploy(form_id)
+                result["deployment"] = "deployed" if deployed is not None else "failed"
+                return result
+            asset_metadata = self.get_asset_metadata(form_id, max_age=0)
+            if asset_metadata is None:
+                result["deployment"] = "failed"
+            elif not asset_metadata.get("has_deployment"):
+                deployed = self._deploy(form_id)
+                result["deployment"] = "deployed" if deployed is not None else "failed"
+            elif asset_metadata.get("deployed_version_id") == asset_metadata["version_id"]:
+                result["deployment"] = "unchanged"
+            else:
+                deployed = self._redeploy(form_id, asset_metadata["version_id"])
+                result["deployment"] = "redeployed" if deployed is not None else "failed"
+            return result
+
+        def finish_form(result:dict, import_response:Optional[dict]) -> dict:
+            if import_response is None:
+                return result
+            form_id = result["uid"]
+            if form_id:
+                self._expire_asset(form_id)
+                result["import"] = "updated"
+            else:
+                form_id = import_response["messages"]["created"][0]["uid"]
+                result.update({"uid": form_id, "import": "created"})
+                with manifest_lock:
+                    manifest[result["file"]] = form_id
+                    save_forms_manifest(manifest_path, manifest)
+            self._record_form_hash(form_id, result["digest"])
+            return deploy_form(result) if deploy else result
+
+        def done(result:dict) -> None:
+            result["elapsed"] = time.monotonic() - result.pop("start")
+            print(f"{result['file']}: import {result['import']}, deployment {result['deployment']} ({result['elapsed']:.1f}s)")
+            results.append(result)
+
+        print(f"Syncing {len(file_names)} forms from {form_dir} with up to {concurrency} at once.......")
+        results = []
+        # running maps each future to its stage and form; waiting is a heap of
+        # (next check time, SN, form, poller) for imports that are being processed.
+        running = {}
+        waiting = []
+        form_hashes = load_form_hashes()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index, file_name in enumerate(file_names):
+                form_id = manifest.get(file_name)
+                file_path = os.path.join(form_dir, file_name)
+                result = {"index": index, "file": file_name, "file_path": file_path, "uid": form_id, "digest": form_digest(file_path),
+                          "import": "failed", "deployment": "-", "start": time.monotonic()}
+                if form_id and not force and result["digest"] is not None and form_hashes.get(form_id) == result["digest"]:
+                    # An unchanged file only skips the import; its deployment is still checked.
+                    result["import"] = "unchanged"
+                    if deploy:
+                        running[executor.submit(deploy_form, result)] = ("finish", result)
+                    else:
+                        done(result)
+                    continue
+                running[executor.submit(start_form, result)] = ("upload", result)
+
+            while running or waiting:
+                now = time.monotonic()
+                while waiting and waiting[0][0] <= now:
+                    _, _, result, poller = heapq.heappop(waiting)
+                    running[executor.submit(self._check_status, result["job"])] = ("poll", (result, poller))
+                if not running:
+                    time.sleep(waiting[0][0] - now)
+                    continue
+                finished, _ = wait(running, timeout=max(0, waiting[0][0] - now) if waiting else None, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, state = running.pop(future)
+                    result = state[0] if stage == "poll" else state
+                    try:
+                        if stage == "upload":
+                            result["job"] = future.result()
+                            if result["job"] is None:
+                                done(result)
+                                continue
+                            poller = self._job_poller(result["job"])
+                            next(poller)
+                            # The first status check is made right away, as in _wait_for_completion.
+                            heapq.heappush(waiting, (time.monotonic(), result["index"], result, poller))
+                        elif stage == "poll":
+                            poller = state[1]
+                            try:
+                                delay = poller.send(future.result())
+                            except StopIteration as completed:
+                                running[executor.submit(finish_form, result, completed.value)] = ("finish", result)
+                            else:
+                                heapq.heappush(waiting, (time.monotonic() + delay, result["index"], result, poller))
+                        else:
+                            done(future.result())
+                    except Exception as e:
+                        # One failing form must not stop the others from being polled.
+                        print(f"{result['file']}: {stage} failed: {e}")
+                        if stage == "finish" and deploy and result["import"] != "failed":
+                            result["deployment"] = "failed"
+                        else:
+                            result["import"] = "failed"
+                        done(result)
+        results.sort(key=lambda result: result["index"])
+        for result in results:
+            for key in ("file_path", "digest", "job"):
+                result.pop(key, None)
+
+        table = Table(title="Form Sync Summary")
+        table.add_column("SN", justify="right", no_wrap=True)
+        table.add_column("File", overflow="fold")
+        table.add_column("AssetID", justify="right", overflow="fold")
+        table.add_column("Import", justify="right")
+        table.add_column("Deployment", justify="right")
+        table.add_column("Elapsed", justify="right")
+        for result in results:
+            table.add_row(f"{result['index']+1}", result["file"], result["uid"] or "-", result["import"], result["deployment"], f"{result['elapsed']:.1f}s")
+        console = Console()
+        console.print(table)
+        return results
+
+    def show_jobs(self) -> None:
+        from rich.console import Console
+        from rich.table import Table
+        jobs = load_jobs()
+        if not jobs:
+            print("No import or export jobs recorded.")
             return
-        data_res= self._make_request(method="GET", url=data_url_res["result"] )
-        if data_res.status_code == 200:
-             with open(file_path, "wb") as file:
-                file.write(data_res.content)
-                print(f"File downloaded successfully and saved to {file_path}.")
+        table = Table(title="Jobs")
+        table.add_column("SN", justify="right", no_wrap=True)
+        table.add_column("Job", overflow="fold")
+        table.add_column("Kind")
+        table.add_column("AssetID", justify="right", overflow="fold")
+        table.add_column("Status", justify="right")
+        table.add_column("Started", justify="right")
+        table.add_column("File", overflow="fold")
+        for index, (url, job) in enumerate(sorted(jobs.items(), key=lambda item: item[1].get("created_at", 0))):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(job.get("created_at", 0)))
+            table.add_row(f"{index+1}", url.rstrip("/").rsplit("/", 1)[-1], job.get("kind", "-"), job.get("asset") or "-",
+                          job.get("status", "-"), started, job.get("file_path") or "-")
+        console = Console()
+        console.print(table)
+
+    def resume_jobs(self, job_ids:tuple= (), wait:bool= True) -> list:
+        # Picks up journaled jobs (all pending ones unless job URLs/UIDs are given).
+        # With wait the jobs are polled until they finish; otherwise each is checked
+        # once and only the finished ones are collected. Finished exports are
+        # downloaded to the file they were started for and run through their
+        # journaled pipeline.
+        from rich.console import Console
+        from rich.table import Table
+        jobs = load_jobs()
+        if job_ids:
+            selected = []
+            for job_id in job_ids:
+                matches = [url for url in jobs if url == job_id or url.rstrip("/").endswith(f"/{job_id}")]
+                if not matches:
+                    print(f"Unknown job: {job_id}")
+                selected.extend(matches)
         else:
-                print(f"Failed to download file. Status code: {data_res.status_code}")
-        
-    pass
+            selected = [url for url, job in jobs.items() if job.get("status") == "pending"]
+        if not selected:
+            print("No pending jobs.")
+            return []
+
+        results = []
+        for url in selected:
+            job = jobs[url]
+            if wait:
+                status_response = self._wait_for_completion(url)
+            else:
+                status_response = self._check_status(url)
+                finish_job(url, status_response)
+            status = status_response.get("status") if status_response is not None else "unreachable"
+            outcome = status
+            if status == "complete" and job.get("kind") == "export":
+                if job.get("file_path"):
+                    from bifrost_cli.pipeline import Pipeline
+                    pipeline = Pipeline(**job["pipeline"]) if job.get("pipeline") else None
+                    size = self._collect_export(status_response, job["file_path"], progress=False, pipeline=pipeline)
+                    if size is None:
+                        outcome = "download failed" if pipeline is None else "failed"
+                    else:
+                        outcome = "downloaded" if pipeline is None else "processed"
+            elif status == "complete" and job.get("kind") == "import":
+                form_id = job.get("asset") or status_response["messages"]["created"][0]["uid"]
+                outcome = "updated" if job.get("asset") else f"created {form_id}"
+                self._record_form_hash(form_id, job.get("digest"))
+                self._expire_asset(form_id)
+            results.append({"job": url.rstrip("/").rsplit("/", 1)[-1], "kind": job.get("kind", "-"), "uid": job.get("asset") or "-",
+                            "outcome": outcome, "file_path": job.get("file_path") or "-"})
+
+        table = Table(title="Job Summary")
+        table.add_column("SN", justify="right", no_wrap=True)
+        table.add_column("Job", overflow="fold")
+        table.add_column("Kind")
+        table.add_column("AssetID", justify="right", overflow="fold")
+        table.add_column("Outcome", justify="right")
+        table.add_column("File", overflow="fold")
+        for index, result in enumerate(results):
+            table.add_row(f"{index+1}", result["job"], result["kind"], result["uid"], result["outcome"], result["file_path"])
+        console = Console()
+        console.print(table)
+        return results
+
+def get_bifrost(config:dict, **kwargs) -> Bifrost:
+    ctx = click.get_current_context(silent=True)
+    no_cache = ctx is not None and ctx.find_root().params.get('no_cache')
+    if not no_cache and 'cache' not in kwargs:
+        kwargs['cache'] = AssetCache(ttl=config.get('KOBO_CACHE_TTL', DEFAULT_CACHE_TTL))
+        # The cache is written once when the command finishes, even if it fails.
+        if ctx is not None:
+            ctx.call_on_close(kwargs['cache'].flush)
+    profiler = ctx.meta.get('bifrost.profiler') if ctx is not None else None
+    if profiler is not None:
+        kwargs.setdefault('instrument', profiler)
+    return Bifrost(
+        config['KOBO_API_BASE_URL'],
+        config['KOBO_API_KEY'],
+        connect_timeout=config.get('KOBO_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+        read_timeout=config.get('KOBO_READ_TIMEOUT', DEFAULT_READ_TIMEOUT),
+        retries=config.get('KOBO_RETRIES', DEFAULT_RETRIES),
+        poll_timeout=config.get('KOBO_POLL_TIMEOUT', DEFAULT_POLL_TIMEOUT),
+        **kwargs,
+    )
+
+def build_export_options(export_type:str, current_version:bool, separator:str, gheaders:bool, language:str,
+                         multiple_select:str, no_media_url:bool, xtext:bool= False) -> dict:
+    return {
+        "fields":[],
+        'type': export_type,
+        "fields_from_all_versions":current_version,
+        'group_sep': separator,
+        'hierarchy_in_labels': gheaders,
+        'lang': language,
+        "multiple_select":multiple_select,
+        'include_media_url': no_media_url,
+        'xls_types_as_text':xtext
+    }
+
+def pipeline_options(f):
+    # Post-processing options shared by the CSV export commands; see build_pipeline.
+    options = [
+        click.option('--select', help='Comma separated columns to keep, in this order, using the renamed names.'),
+        click.option('--rename', multiple=True, metavar='OLD=NEW', help='Rename a column. Can be given several times.'),
+        click.option('--strip-groups', is_flag=True, default=False, help='Drop group paths from column names (exports made with -gh).'),
+        click.option('--date-column', default='_submission_time', show_default=True, help='Column filtered by --since and --until.'),
+        click.option('--since', type=click.DateTime(formats=["%Y-%m-%d"]), help='Keep rows dated on or after this day (YYYY-MM-DD).'),
+        click.option('--until', type=click.DateTime(formats=["%Y-%m-%d"]), help='Keep rows dated on or before this day (YYYY-MM-DD).'),
+        click.option('--split-by', metavar='COLUMN', help='Write one file per value of this column.'),
+        click.option('--split-groups', is_flag=True, default=False, help='Write one file per top level group (exports made with -gh).'),
+        click.option('--compress', type=click.Choice(["gzip", "zstd"]), default=None, help='Compress the output files (zstd requires zstandard).'),
+    ]
+    for option in reversed(options):
+        f = option(f)
+    return f
+
+def build_pipeline(separator:str, select:str= None, rename:tuple= (), strip_groups:bool= False, date_column:str= '_submission_time',
+                   since=None, until=None, split_by:str= None, split_groups:bool= False, compress:str= None) -> Optional[Pipeline]:
+    # Returns None when no post-processing was asked for, so the export is left untouched.
+    if not (select or rename or strip_groups or since or until or split_by or split_groups or compress):
+        return None
+    from bifrost_cli.pipeline import Pipeline
+    renames = {}
+    for entry in rename:
+        old, sep, new = entry.partition("=")
+        if not sep or not old or not new:
+            raise click.BadParameter(f"Expected OLD=NEW, got: {entry}", param_hint="--rename")
+        renames[old] = new
+    if split_by and split_groups:
+        raise click.UsageError("--split-by and --split-groups cannot be combined.")
+    if since and until and since > until:
+        raise click.UsageError("--since must not be later than --until.")
+    try:
+        return Pipeline(select=[column.strip() for column in select.split(",") if column.strip()] if select else None,
+                        rename=renames, strip_groups=strip_groups, group_sep=separator, date_column=date_column,
+                        since=since.date().isoformat() if since else None, until=until.date().isoformat() if until else None,
+                        split_by=split_by, split_groups=split_groups, compress=compress)
+    except (ValueError, RuntimeError) as e:
+        raise click.UsageError(str(e))
+
+def load_export_manifest(manifest_path:str) -> list:
+    # The manifest is a JSON list whose entries are either a UID or
+    # {"uid": ..., "file_name": ...}.
+    with open(manifest_path, 'r') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise click.BadParameter("Manifest must contain a JSON list of UIDs or {\"uid\", \"file_name\"} objects.")
+    manifest = []
+    for entry in entries:
+        if isinstance(entry, str):
+            manifest.append((entry, None))
+        elif isinstance(entry, dict) and entry.get("uid"):
+            manifest.append((entry["uid"], entry.get("file_name")))
+        else:
+            raise click.BadParameter(f"Invalid manifest entry: {entry}")
+    return manifest
+
+def unique_exports(exports:list) -> list:
+    # Repeated (uid, file) entries are dropped. Two different forms exported to the
+    # same file would stream into the same "<file>.part" at once, so that is rejected.
+    seen = {}
+    unique = []
+    for uid, file_path in exports:
+        key = os.path.normcase(os.path.abspath(file_path))
+        if key in seen:
+            if seen[key] != uid:
+                raise click.UsageError(f"{seen[key]} and {uid} are both exported to {file_path}.")
+            continue
+        seen[key] = uid
+        unique.append((uid, file_path))
+    return unique
 
 @click.group()
-def cli():
+@click.option('--no-cache', is_flag=True, default=False, help='Bypass the local asset metadata cache.')
+@click.option('--profile', is_flag=True, default=False, help='Print a summary of HTTP requests, job polls and downloads when the command finishes.')
+@click.option('--trace', type=click.Path(dir_okay=False, writable=True), default=None, help='Write one NDJSON span per HTTP request, job poll and download to this file.')
+@click.pass_context
+def cli(ctx, no_cache, profile, trace):
     """Bifrost CLI for interacting with KoboToolbox API"""
-    pass
+    if profile or trace:
+        profiler = Profiler(trace_path=trace, summary=profile)
+        ctx.meta['bifrost.profiler'] = profiler
+        ctx.call_on_close(profiler.close)
 
 @cli.command()
+@click.option('-n', '--limit', type=click.IntRange(min=1), default=None, help='Maximum number of assets to list.')
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, help='Number of assets fetched per request.')
+@click.option('-q', '--query', default=None, help='Server-side filter, e.g. "asset_type:survey AND name__icontains:health".')
+@click.option('-f', '--fields', default=None, help='Comma separated asset fields to include in --json/--ndjson output.')
+@click.option('--json', 'output', flag_value='json', help='Stream assets as a JSON array.')
+@click.option('--ndjson', 'output', flag_value='ndjson', help='Stream assets as newline-delimited JSON.')
 @ensure_config
-def list_assets():
+def list_assets(limit, page_size, query, fields, output):
     """List all assets"""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
-    bifrost.get_all_asset()
+    bifrost = get_bifrost(config)
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    bifrost.get_all_asset(page_size=page_size, limit=limit, query=query, fields=field_list, output=output or "table")
 
 @cli.command()
 @click.argument('filepath')
@@ -264,7 +1533,7 @@ def list_assets():
 def create(filepath, deploy):
     """Create a new form"""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     form_id = bifrost.create_form(filepath)
     if deploy and form_id:
         bifrost.deploy_form(form_id)
@@ -275,7 +1544,7 @@ def create(filepath, deploy):
 def deploy(uid):
     """Deploy a form"""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     bifrost.deploy_form(uid)
 
 @cli.command()
@@ -283,16 +1552,20 @@ def deploy(uid):
 @click.argument('filepath')
 @click.option('-rd', '--redeploy', is_flag=True, help='Redeploy the deployed form after update')
 @click.option('-d', '--deploy', is_flag=True, help='Deploy the draft form after update')
+@click.option('-f', '--force', is_flag=True, help='Import even if the file has not changed since the last import, and redeploy even if the latest version is deployed')
 @ensure_config
-def update(uid, filepath, deploy, redeploy):
+def update(uid, filepath, deploy, redeploy, force):
     """Update a form"""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
-    bifrost.update_form(uid, filepath)
+    bifrost = get_bifrost(config)
+    if not force and bifrost.form_unchanged(uid, filepath):
+        print("Form file is unchanged since its last import. Skipping the import (use --force to override).")
+    else:
+        bifrost.update_form(uid, filepath)
     if deploy:
         bifrost.deploy_form(uid)
     if redeploy:
-        bifrost.redeploy_form(uid)
+        bifrost.redeploy_form(uid, skip_current=not force)
 
 @cli.command()
 @click.argument('uid')
@@ -300,7 +1573,7 @@ def update(uid, filepath, deploy, redeploy):
 def redeploy(uid):
     """Redeploy a form"""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     bifrost.redeploy_form(uid)
 
 @cli.command()
@@ -310,29 +1583,47 @@ def remove(uid):
     """Remove a form"""
     config = load_config()
     if click.confirm("This will permanently delete your form and its data. Are you sure you want to continue?"):
-        bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+        bifrost = get_bifrost(config)
         bifrost.delete_form(uid)
 
 @cli.command()
-@click.argument('uid')
-@click.option('--no-auth-sub', is_flag=True, help='allow data submission without authentication.')
+@click.argument('uids', nargs=-1)
+@click.option('-q', '--query', default=None, help='Also apply to every asset matching this filter, e.g. "name__icontains:health".')
+@click.option('--no-auth-sub', 'no_auth', is_flag=True, help='allow data submission without authentication.')
+@click.option('-u', '--user', 'users', multiple=True, help='Username to grant --perm to. Can be repeated.')
+@click.option('-p', '--perm', 'perms', multiple=True, help='Permission codename to grant, e.g. view_submissions. Can be repeated.')
+@click.option('-j', '--concurrency', type=click.IntRange(min=1), default=8, help='Maximum number of forms updated at once.')
 @ensure_config
-def set_permissions(uid, no_auth):
-    """Set form permissions"""
+def set_permissions(uids, query, no_auth, users, perms, concurrency):
+    """Set permissions of one or many forms"""
+    if bool(users) != bool(perms):
+        raise click.UsageError("--user and --perm must be used together.")
+    if not no_auth and not users:
+        raise click.UsageError("Nothing to set. Use --no-auth-sub or --user/--perm.")
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config, pool_size=concurrency)
+    assignments = [bifrost.permission_assignment(user, perm) for user in users for perm in perms]
     if no_auth:
-        bifrost.submission_without_auth(uid)
+        assignments.append(bifrost.permission_assignment("AnonymousUser", "add_submissions"))
+    form_ids = bifrost.resolve_assets(uids, query)
+    if not form_ids:
+        raise click.UsageError("Provide at least one UID or a --query matching some assets.")
+    bifrost.set_permissions(form_ids, assignments, concurrency=concurrency)
 
 @cli.command()
 @click.argument('source_uid')
-@click.argument('target_uid')
+@click.argument('target_uids', nargs=-1)
+@click.option('-q', '--query', default=None, help='Also clone to every asset matching this filter.')
+@click.option('-j', '--concurrency', type=click.IntRange(min=1), default=8, help='Maximum number of forms updated at once.')
 @ensure_config
-def clone_permissions(source_uid, target_uid):
-    """Clone permissions from [Source] one form to another [Target]"""
+def clone_permissions(source_uid, target_uids, query, concurrency):
+    """Clone permissions from [Source] one form to other forms [Targets]"""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
-    bifrost.clone_premission(target_uid, source_uid)
+    bifrost = get_bifrost(config, pool_size=concurrency)
+    form_ids = [form_id for form_id in bifrost.resolve_assets(target_uids, query) if form_id != source_uid]
+    if not form_ids:
+        raise click.UsageError("Provide at least one target UID or a --query matching some assets.")
+    bifrost.clone_permissions(source_uid, form_ids, concurrency=concurrency)
 
 @cli.group()
 def asset():
@@ -341,21 +1632,23 @@ def asset():
 
 @asset.command("xls")
 @click.argument('uid')
+@click.option('--no-progress', is_flag=True, default=False, help='Hide the download progress bar.')
 @ensure_config
-def asset_csv(uid):
+def asset_csv(uid, no_progress):
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     datapath = os.path.join(config["KOBO_DOWNLOADS"], f"{uid}.xlsx")
-    bifrost.get_asset(form_id=uid, file_path=datapath, asset_type="xls")
+    bifrost.get_asset(form_id=uid, file_path=datapath, asset_type="xls", progress=not no_progress)
 
 @asset.command("xml")
 @click.argument('uid')
+@click.option('--no-progress', is_flag=True, default=False, help='Hide the download progress bar.')
 @ensure_config
-def asset_csv(uid):
+def asset_csv(uid, no_progress):
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     datapath = os.path.join(config["KOBO_DOWNLOADS"], f"{uid}.xml")
-    bifrost.get_asset(form_id=uid, file_path=datapath, asset_type="xml")
+    bifrost.get_asset(form_id=uid, file_path=datapath, asset_type="xml", progress=not no_progress)
 
 @cli.group()
 def export():
@@ -371,26 +1664,20 @@ def export():
 @click.option('-lang', '--language', default='_default', help='Language for the export: _default, _xml or language code.')
 @click.option('-nmu', '--no-media-url', is_flag=True, default=True, help='Include media URL in the export.')
 @click.option('-ms', '--multiple-select',  type=click.Choice(["details","both","summary"]), default='summary', help='Include media URL in the export.')
+@click.option('--no-progress', is_flag=True, default=False, help='Hide the download progress bar.')
+@click.option('--fresh', is_flag=True, default=False, help='Start a new export even if a completed one with the same options and submissions exists.')
+@pipeline_options
 @ensure_config
-def export_csv(uid, current_version, file_name, separator,multiple_select, gheaders, language, no_media_url):
+def export_csv(uid, current_version, file_name, separator,multiple_select, gheaders, language, no_media_url, no_progress, fresh, **pipeline_args):
     """Export data as CSV."""
+    pipeline = build_pipeline(separator, **pipeline_args)
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     datapath = os.path.join(config["KOBO_DOWNLOADS"], file_name)
 
-    export_options = {
-        "fields":[],
-        'type': 'csv',
-        "fields_from_all_versions":current_version,
-        'group_sep': separator,
-        'hierarchy_in_labels': gheaders,
-        'lang': language,
-        "multiple_select":multiple_select,
-        'include_media_url': no_media_url,
-        'xls_types_as_text':False
-    }
-    
-    bifrost.export_data(form_id=uid, file_path=datapath, export_options=export_options)
+    export_options = build_export_options('csv', current_version, separator, gheaders, language, multiple_select, no_media_url, False)
+
+    bifrost.export_data(form_id=uid, file_path=datapath, export_options=export_options, progress=not no_progress, reuse=not fresh, pipeline=pipeline)
 
 @export.command('xls')
 @click.argument('uid')
@@ -402,26 +1689,175 @@ def export_csv(uid, current_version, file_name, separator,multiple_select, ghead
 @click.option('-nmu', '--no-media-url', is_flag=True, default=True, help='Include media URL in the export.')
 @click.option('-xt', '--xtext', is_flag=True, default=False, help='Store data and number response as text.')
 @click.option('-ms', '--multiple-select',  type=click.Choice(["details","both","summary"]), default='summary', help='Include media URL in the export.')
+@click.option('--no-progress', is_flag=True, default=False, help='Hide the download progress bar.')
+@click.option('--fresh', is_flag=True, default=False, help='Start a new export even if a completed one with the same options and submissions exists.')
 @ensure_config
-def export_xls(uid,xtext, current_version, file_name, separator,multiple_select, gheaders, language, no_media_url):
+def export_xls(uid,xtext, current_version, file_name, separator,multiple_select, gheaders, language, no_media_url, no_progress, fresh):
     """Export data as XLS."""
     config = load_config()
-    bifrost = Bifrost(config['KOBO_API_BASE_URL'], config['KOBO_API_KEY'])
+    bifrost = get_bifrost(config)
     datapath = os.path.join(config["KOBO_DOWNLOADS"], file_name)
 
-    export_options = {
-        "fields":[],
-        'type': 'xls',
-        "fields_from_all_versions":current_version,
-        'group_sep': separator,
-        'hierarchy_in_labels': gheaders,
-        'lang': language,
-        "multiple_select":multiple_select,
-        'include_media_url': no_media_url,
-        'xls_types_as_text':xtext
-    }
-    
-    bifrost.export_data(form_id=uid, file_path=datapath, export_options=export_options)
+    export_options = build_export_options('xls', current_version, separator, gheaders, language, multiple_select, no_media_url, xtext)
+
+    bifrost.export_data(form_id=uid, file_path=datapath, export_options=export_options, progress=not no_progress, reuse=not fresh)
+
+@export.command('batch')
+@click.argument('uids', nargs=-1)
+@click.option('-m', '--manifest', type=click.Path(exists=True, dir_okay=False), help='JSON file listing UIDs or {"uid", "file_name"} objects.')
+@click.option('-t', '--type', 'export_type', type=click.Choice(["csv","xls"]), default='csv', help='Export format.')
+@click.option('-j', '--concurrency', type=click.IntRange(min=1), default=4, help='Maximum number of exports running at once.')
+@click.option('-sep', '--separator', default='/', help='Group Separator for data.')
+@click.option('-c', '--current-version',is_flag=True, default=True, help='Include data from all Versions')
+@click.option('-gh', '--gheaders', is_flag=True, default=False, help='Include group headers in the export.')
+@click.option('-lang', '--language', default='_default', help='Language for the export: _default, _xml or language code.')
+@click.option('-nmu', '--no-media-url', is_flag=True, default=True, help='Include media URL in the export.')
+@click.option('-xt', '--xtext', is_flag=True, default=False, help='Store data and number response as text (xls only).')
+@click.option('-ms', '--multiple-select',  type=click.Choice(["details","both","summary"]), default='summary', help='Include media URL in the export.')
+@click.option('--fresh', is_flag=True, default=False, help='Start a new export even if a completed one with the same options and submissions exists.')
+@ensure_config
+def export_batch(uids, manifest, export_type, concurrency, current_version, separator, gheaders, language, no_media_url, xtext, multiple_select, fresh):
+    """Export data of many forms concurrently."""
+    config = load_config()
+    entries = [(uid, None) for uid in uids]
+    if manifest:
+        entries.extend(load_export_manifest(manifest))
+    if not entries:
+        raise click.UsageError("Provide at least one UID or a --manifest file.")
+    extension = "csv" if export_type == "csv" else "xlsx"
+    exports = unique_exports([(uid, os.path.join(config["KOBO_DOWNLOADS"], file_name or f"{uid}.{extension}")) for uid, file_name in entries])
+    export_options = build_export_options(export_type, current_version, separator, gheaders, language, multiple_select,
+                                          no_media_url, xtext if export_type == "xls" else False)
+    bifrost = get_bifrost(config, pool_size=concurrency, verbose=False)
+    bifrost.export_batch(exports, export_options, concurrency=concurrency, reuse=not fresh)
+
+@export.command('watch')
+@click.argument('uid')
+@click.argument('file_name')
+@click.option('-i', '--interval', type=click.FloatRange(min=1), default=300, help='Seconds between submission count checks.')
+@click.option('-t', '--type', 'export_type', type=click.Choice(["csv","xls"]), default='csv', help='Export format.')
+@click.option('-sep', '--separator', default='/', help='Group Separator for data.')
+@click.option('-c', '--current-version',is_flag=True, default=True, help='Include data from all Versions')
+@click.option('-gh', '--gheaders', is_flag=True, default=False, help='Include group headers in the export.')
+@click.option('-lang', '--language', default='_default', help='Language for the export: _default, _xml or language code.')
+@click.option('-nmu', '--no-media-url', is_flag=True, default=True, help='Include media URL in the export.')
+@click.option('-xt', '--xtext', is_flag=True, default=False, help='Store data and number response as text (xls only).')
+@click.option('-ms', '--multiple-select',  type=click.Choice(["details","both","summary"]), default='summary', help='Include media URL in the export.')
+@pipeline_options
+@ensure_config
+def export_watch(uid, file_name, interval, export_type, current_version, separator, gheaders, language, no_media_url, xtext, multiple_select, **pipeline_args):
+    """Keep an export up to date, refreshing it when new submissions arrive."""
+    pipeline = build_pipeline(separator, **pipeline_args)
+    if pipeline is not None and export_type != "csv":
+        raise click.UsageError("Post-processing options only apply to CSV exports.")
+    config = load_config()
+    bifrost = get_bifrost(config)
+    datapath = os.path.join(config["KOBO_DOWNLOADS"], file_name)
+    export_options = build_export_options(export_type, current_version, separator, gheaders, language, multiple_select,
+                                          no_media_url, xtext if export_type == "xls" else False)
+    bifrost.watch_export(uid, datapath, export_options, interval=interval, pipeline=pipeline)
+
+@cli.command()
+@click.argument('uid')
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_SYNC_PAGE_SIZE, help='Number of submissions fetched per request.')
+@click.option('--full', is_flag=True, default=False, help='Discard the local store and sync every submission again.')
+@click.option('--columnar', type=click.Choice(sorted(store.COLUMNAR_FORMATS)), default=None, help='Also write the submissions to a columnar store (requires pyarrow).')
+@ensure_config
+def sync(uid, page_size, full, columnar):
+    """Fetch only new submissions of a form into a local store"""
+    config = load_config()
+    bifrost = get_bifrost(config)
+    store_dir = os.path.join(config["KOBO_DOWNLOADS"], uid)
+    if columnar and not store.pyarrow_available():
+        raise click.ClickException("--columnar requires pyarrow. Install it with: pip install 'bifrost-cli[columnar]'")
+    synced = bifrost.sync_submissions(uid, store_dir, page_size=page_size, full=full)
+    if columnar and synced is not None:
+        bifrost.build_columnar_store(uid, store_dir, fmt=columnar)
+
+@cli.command()
+@click.argument('uid')
+@click.option('-j', '--concurrency', type=click.IntRange(min=1), default=8, help='Maximum number of files downloaded at once.')
+@click.option('--verify', is_flag=True, default=False, help='Re-download files whose size differs from the server copy.')
+@ensure_config
+def attachments(uid, concurrency, verify):
+    """Download the media attachments of a form's submissions"""
+    config = load_config()
+    bifrost = get_bifrost(config, pool_size=concurrency)
+    out_dir = os.path.join(config["KOBO_DOWNLOADS"], uid, ATTACHMENTS_DIR)
+    bifrost.download_attachments(uid, out_dir, concurrency=concurrency, verify=verify)
+
+@cli.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('-m', '--manifest', type=click.Path(dir_okay=False), default=None, help=f'JSON file mapping XLSForm file names to asset UIDs. default=<directory>/{FORMS_MANIFEST_FILE}')
+@click.option('-d', '--deploy', is_flag=True, help='Deploy new forms and redeploy deployed forms after their import')
+@click.option('-j', '--concurrency', type=click.IntRange(min=1), default=4, help='Maximum number of forms processed at once.')
+@click.option('-f', '--force', is_flag=True, help='Import forms even if their file has not changed since the last import')
+@ensure_config
+def sync_forms(directory, manifest, deploy, concurrency, force):
+    """Create or update every XLSForm in a directory"""
+    config = load_config()
+    bifrost = get_bifrost(config, pool_size=concurrency, verbose=False)
+    manifest_path = manifest or os.path.join(directory, FORMS_MANIFEST_FILE)
+    bifrost.sync_forms(directory, manifest_path, deploy=deploy, concurrency=concurrency, force=force)
+
+@cli.group()
+def jobs():
+    """Manage import and export jobs recorded in the job journal"""
+    pass
+
+@jobs.command('list')
+@ensure_config
+def jobs_list():
+    """List recorded import and export jobs"""
+    config = load_config()
+    bifrost = get_bifrost(config)
+    bifrost.show_jobs()
+
+@jobs.command('resume')
+@click.argument('job_ids', nargs=-1)
+@ensure_config
+def jobs_resume(job_ids):
+    """Wait for pending jobs (or the given job UIDs/URLs) and download finished exports"""
+    config = load_config()
+    bifrost = get_bifrost(config)
+    bifrost.resume_jobs(job_ids, wait=True)
+
+@jobs.command('collect')
+@click.argument('job_ids', nargs=-1)
+@ensure_config
+def jobs_collect(job_ids):
+    """Check pending jobs once and download the exports that have finished"""
+    config = load_config()
+    bifrost = get_bifrost(config)
+    bifrost.resume_jobs(job_ids, wait=False)
+
+@jobs.command('clear')
+@click.option('--all', 'clear_all', is_flag=True, default=False, help='Also forget pending jobs.')
+def jobs_clear(clear_all):
+    """Forget finished jobs"""
+    jobs = load_jobs()
+    remove_jobs([url for url, job in jobs.items() if clear_all or job.get("status") != "pending"])
+    click.echo("Job journal has been cleared.")
+
+@cli.group()
+def cache():
+    """Manage the local asset metadata cache"""
+    pass
+
+@cache.command('clear')
+def cache_clear():
+    """Remove all cached asset metadata"""
+    AssetCache().clear()
+    click.echo("Cache has been cleared.")
+
+@cache.command('info')
+def cache_info():
+    """Show the cache location and size"""
+    from rich.filesize import decimal
+    stats = AssetCache().stats()
+    click.echo(f"Cache file: {CACHE_FILE}")
+    click.echo(f"Entries: {stats['entries']}")
+    click.echo(f"Size: {decimal(stats['bytes'])}")
 
 @cli.group()
 def config():
@@ -455,6 +1891,44 @@ def downloads_path(folder_path):
     save_config(config)
     click.echo("Downloads path has been set.")
 
+@config.command()
+@click.argument('connect', type=float)
+@click.argument('read', type=float)
+def timeout(connect, read):
+    """Set the connect and read timeouts in seconds"""
+    config = load_config()
+    config['KOBO_CONNECT_TIMEOUT'] = connect
+    config['KOBO_READ_TIMEOUT'] = read
+    save_config(config)
+    click.echo("Timeouts have been set.")
+
+@config.command()
+@click.argument('count', type=click.IntRange(min=0))
+def retries(count):
+    """Set the number of retries for failed requests"""
+    config = load_config()
+    config['KOBO_RETRIES'] = count
+    save_config(config)
+    click.echo("Retries have been set.")
+
+@config.command()
+@click.argument('seconds', type=click.FloatRange(min=0, min_open=True))
+def poll_timeout(seconds):
+    """Set the maximum time to wait for import/export jobs in seconds"""
+    config = load_config()
+    config['KOBO_POLL_TIMEOUT'] = seconds
+    save_config(config)
+    click.echo("Poll timeout has been set.")
+
+@config.command()
+@click.argument('seconds', type=click.FloatRange(min=0))
+def cache_ttl(seconds):
+    """Set how long cached asset metadata is used without revalidation"""
+    config = load_config()
+    config['KOBO_CACHE_TTL'] = seconds
+    save_config(config)
+    click.echo("Cache TTL has been set.")
+
 @config.command()
 def view():
     """View current configuration"""
@@ -463,9 +1937,13 @@ def view():
         click.echo(f"API URL: {config.get('KOBO_API_BASE_URL', 'Not set')}")
         click.echo(f"API Key: {config.get('KOBO_API_KEY', 'Not set')}")
         click.echo(f"Downloads Path: {config.get('KOBO_DOWNLOADS', 'Not set')}")
+        click.echo(f"Timeouts (connect/read): {config.get('KOBO_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)}s / {config.get('KOBO_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)}s")
+        click.echo(f"Retries: {config.get('KOBO_RETRIES', DEFAULT_RETRIES)}")
+        click.echo(f"Poll timeout: {config.get('KOBO_POLL_TIMEOUT', DEFAULT_POLL_TIMEOUT)}s")
+        click.echo(f"Cache TTL: {config.get('KOBO_CACHE_TTL', DEFAULT_CACHE_TTL)}s")
 
    
 def main():
     cli()
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+CACHE_FILE = os.path.expanduser('~/.bifrost_cache.json')
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+
+class AssetCache:
+    """On-disk cache of asset metadata responses.
+
+    Entries are keyed by asset UID (or by request URL for asset list pages) and
+    keep the response validators so stale entries can be revalidated with a
+    conditional GET. The file is bounded to ``max_bytes``; the least recently
+    used entries are evicted first. Changes are kept in memory and written by
+    :meth:`flush`, once per command rather than once per response.
+    """
+
+    def __init__(self, path:str= CACHE_FILE, ttl:float= DEFAULT_CACHE_TTL, max_bytes:int= DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self) -> OrderedDict:
+        if self._entries is None:
+            self._entries = OrderedDict()
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as f:
+                        self._entries = OrderedDict(json.load(f))
+                except (OSError, ValueError):
+                    print(f"Ignoring unreadable cache file: {self.path}")
+        return self._entries
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = self._load()
+            total = sum(entry["size"] for entry in entries.values())
+            while entries and total > self.max_bytes:
+                _, evicted = entries.popitem(last=False)
+                total -= evicted["size"]
+            tmp_path = f"{self.path}.tmp"
+            # json.dumps is much faster than streaming json.dump into the file.
+            with open(tmp_path, 'w') as f:
+                f.write(json.dumps(entries))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def get(self, key:str) -> Optional[dict]:
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry:dict, max_age:Optional[float]= None) -> bool:
+        max_age = self.ttl if max_age is None else max_age
+        return time.time() - entry["fetched_at"] < max_age
+
+    def put(self, key:str, data, etag:Optional[str]= None, last_modified:Optional[str]= None) -> None:
+        with self._lock:
+            entries = self._load()
+            entries.pop(key, None)
+            entries[key] = {
+                "data": data,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": time.time(),
+                "size": len(json.dumps(data)),
+            }
+            self._dirty = True
+
+    def touch(self, key:str) -> None:
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is not None:
+                entry["fetched_at"] = time.time()
+                self._dirty = True
+
+    def expire(self, *keys:str, prefix:Optional[str]= None) -> None:
+        # Expired entries keep their validators, so the next read is a cheap
+        # conditional GET rather than a full fetch.
+        with self._lock:
+            entries = self._load()
+            stale = [key for key in entries if key in keys or (prefix is not None and key.startswith(prefix))]
+            for key in stale:
+                entries[key]["fetched_at"] = 0
+            if stale:
+                self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = OrderedDict()
+            self._dirty = False
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._load()
+            return {"entries": len(entries), "bytes": sum(entry["size"] for entry in entries.values())}
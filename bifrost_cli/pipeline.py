@@ -0,0 +1,259 @@
+import csv
+import gzip
+import hashlib
+import importlib.util
+import io
+import os
+import re
+from collections import OrderedDict
+from typing import Optional
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+KEY_COLUMNS = ("_id", "_uuid")
+MAIN_GROUP = "main"
+DEFAULT_MAX_OPEN_FILES = 64
+# Kobo text and geoshape fields can exceed the csv module's 128KB default. The
+# limit is a C long, so stay within 32 bits for Windows.
+FIELD_SIZE_LIMIT = 2**31 - 1
+
+
+def zstandard_available() -> bool:
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def require_zstandard():
+    if not zstandard_available():
+        raise RuntimeError("zstd compression requires zstandard. Install it with: pip install 'bifrost-cli[zstd]'")
+    import zstandard
+    return zstandard
+
+
+def _open_output(path:str, compress:Optional[str], append:bool= False):
+    mode = "a" if append else "w"
+    if compress == "gzip":
+        # Appending adds another gzip member, which readers treat as one stream.
+        return gzip.open(path, f"{mode}t", encoding="utf-8", newline="")
+    if compress == "zstd":
+        zstandard = require_zstandard()
+        writer = zstandard.ZstdCompressor().stream_writer(open(path, f"{mode}b"), closefd=True)
+        return io.TextIOWrapper(writer, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _sniff_delimiter(header_line:str) -> str:
+    # KoboToolbox writes CSV exports with ";" by default, which also wins ties.
+    # Quoted names are left out because question labels often contain commas.
+    unquoted = re.sub(r'"(?:[^"]|"")*"', "", header_line)
+    return max((";", ",", "\t"), key=unquoted.count)
+
+
+def _file_key(value:str) -> str:
+    return re.sub(r"[^\w.-]+", "_", value).strip("._") or "empty"
+
+
+class _FileKeys:
+    """Maps values to unique, file name safe keys for one run.
+
+    A value that had to be sanitized, or whose key is already taken (ignoring
+    case, for case-insensitive file systems), gets a short hash of the value
+    appended, so "a b" and "a_b" never end up in the same file.
+    """
+
+    def __init__(self) -> None:
+        self.keys = {}
+        self.taken = set()
+
+    def __call__(self, value:str) -> str:
+        key = self.keys.get(value)
+        if key is None:
+            key = _file_key(value)
+            if key != value or key.casefold() in self.taken:
+                key = f"{key}-{hashlib.sha1(value.encode('utf-8')).hexdigest()[:8]}"
+            unique, suffix = key, 1
+            while unique.casefold() in self.taken:
+                unique, suffix = f"{key}-{suffix}", suffix + 1
+            self.taken.add(unique.casefold())
+            key = self.keys[value] = unique
+        return key
+
+
+class _Outputs:
+    """Bounded set of open CSV writers.
+
+    Split outputs are written to "<path>.tmp" and renamed into place by
+    :meth:`close`. At most ``max_open`` files are open at once; the least
+    recently used one is closed and reopened in append mode when needed.
+    """
+
+    def __init__(self, compress:Optional[str], max_open:int, delimiter:str= ",") -> None:
+        self.compress = compress
+        self.delimiter = delimiter
+        self.max_open = max_open
+        self._open = OrderedDict()
+        self.rows = {}
+
+    def write(self, path:str, header:list, row:Optional[list]= None) -> None:
+        entry = self._open.get(path)
+        if entry is None:
+            if len(self._open) >= self.max_open:
+                _, (evicted, _) = self._open.popitem(last=False)
+                evicted.close()
+            started = path in self.rows
+            handle = _open_output(f"{path}.tmp", self.compress, append=started)
+            writer = csv.writer(handle, delimiter=self.delimiter)
+            if not started:
+                writer.writerow(header)
+                self.rows[path] = 0
+            entry = self._open[path] = (handle, writer)
+        else:
+            self._open.move_to_end(path)
+        if row is not None:
+            entry[1].writerow(row)
+            self.rows[path] += 1
+
+    def close(self) -> list:
+        for handle, _ in self._open.values():
+            handle.close()
+        self._open.clear()
+        for path in self.rows:
+            os.replace(f"{path}.tmp", path)
+        return sorted(self.rows.items())
+
+    def discard(self) -> None:
+        for handle, _ in self._open.values():
+            handle.close()
+        self._open.clear()
+        for path in self.rows:
+            if os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
+
+
+class Pipeline:
+    """Streaming post-processing of a downloaded CSV export.
+
+    Rows are read one at a time and pass through the stages in this order:
+    column renames (``strip_groups`` drops the group path before ``group_sep``,
+    ``rename`` maps old to new names), the date filter on ``date_column``
+    (ISO dates, ``since``/``until`` inclusive), the ``select`` column list and
+    finally splitting, either into one file per value of ``split_by`` or into
+    one file per top level group with ``split_groups``. Column names given to
+    the later stages are the renamed ones. Memory use does not depend on the
+    size of the export.
+    """
+
+    def __init__(self, select:Optional[list]= None, rename:Optional[dict]= None, strip_groups:bool= False, group_sep:str= "/",
+                 date_column:str= "_submission_time", since:Optional[str]= None, until:Optional[str]= None,
+                 split_by:Optional[str]= None, split_groups:bool= False, compress:Optional[str]= None,
+                 max_open_files:int= DEFAULT_MAX_OPEN_FILES) -> None:
+        if split_by and split_groups:
+            raise ValueError("split_by and split_groups cannot be combined.")
+        if compress is not None and compress not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compress}")
+        if compress == "zstd":
+            require_zstandard()
+        self.select = list(select) if select else None
+        self.rename = dict(rename or {})
+        self.strip_groups = strip_groups
+        self.group_sep = group_sep
+        self.date_column = date_column
+        self.since = since
+        self.until = until
+        self.split_by = split_by
+        self.split_groups = split_groups
+        self.compress = compress
+        self.max_open_files = max_open_files
+
+    def options(self) -> dict:
+        # The constructor arguments, JSON serializable so the pipeline can be journaled.
+        return {"select": self.select, "rename": self.rename, "strip_groups": self.strip_groups, "group_sep": self.group_sep,
+                "date_column": self.date_column, "since": self.since, "until": self.until, "split_by": self.split_by,
+                "split_groups": self.split_groups, "compress": self.compress, "max_open_files": self.max_open_files}
+
+    def _renamed(self, header:list) -> list:
+        names = list(header)
+        if self.strip_groups and self.group_sep:
+            short = [name.rsplit(self.group_sep, 1)[-1] for name in names]
+            # Names that would collide once their group is dropped keep the full path.
+            names = [stripped if short.count(stripped) == 1 else name for name, stripped in zip(names, short)]
+        return [self.rename.get(name, name) for name in names]
+
+    def _index(self, names:list, column:str) -> int:
+        if column not in names:
+            raise ValueError(f"Column not found in export: {column}")
+        return names.index(column)
+
+    def _output_path(self, src_path:str, key:Optional[str]= None) -> str:
+        path = src_path
+        if key is not None:
+            stem, extension = os.path.splitext(src_path)
+            path = f"{stem}.{key}{extension}"
+        return path + COMPRESSIONS.get(self.compress, "")
+
+    def run(self, src_path:str, dest_path:Optional[str]= None) -> list:
+        """Process the CSV at src_path and return (output path, rows written) pairs.
+
+        Outputs are named after dest_path (src_path by default): a single output
+        is dest_path with the compression suffix added, split outputs are named
+        "<stem>.<key>.csv". Every output is renamed into place once complete.
+        src_path is removed afterwards unless it was processed in place and
+        nothing was written. The delimiter of the source file is kept.
+        """
+        dest_path = dest_path or src_path
+        csv.field_size_limit(max(csv.field_size_limit(), FIELD_SIZE_LIMIT))
+        outputs = _Outputs(self.compress, self.max_open_files)
+        try:
+            with open(src_path, "r", encoding="utf-8-sig", newline="") as src:
+                header_line = src.readline()
+                delimiter = outputs.delimiter = _sniff_delimiter(header_line)
+                header = next(csv.reader([header_line], delimiter=delimiter))
+                names = self._renamed(header)
+                date_index = self._index(names, self.date_column) if (self.since or self.until) else None
+                columns = [self._index(names, column) for column in self.select] if self.select else list(range(len(names)))
+                selected = [names[index] for index in columns]
+                split_index = selected.index(self.split_by) if self.split_by and self.split_by in selected else None
+                if self.split_by and split_index is None:
+                    raise ValueError(f"Column not found in export: {self.split_by}")
+                groups = self._groups(dest_path, header, names, columns) if self.split_groups else None
+                file_keys = _FileKeys()
+
+                for row in csv.reader(src, delimiter=delimiter):
+                    if date_index is not None:
+                        day = row[date_index][:10] if date_index < len(row) else ""
+                        if not day or (self.since and day < self.since) or (self.until and day > self.until):
+                            continue
+                    values = [row[index] if index < len(row) else "" for index in columns]
+                    if groups is not None:
+                        for path, (group_header, group_columns) in groups.items():
+                            outputs.write(path, group_header, [row[index] if index < len(row) else "" for index in group_columns])
+                    elif split_index is not None:
+                        outputs.write(self._output_path(dest_path, file_keys(values[split_index])), selected, values)
+                    else:
+                        outputs.write(self._output_path(dest_path), selected, values)
+                if groups is None and split_index is None:
+                    # Leave a file with just the header when no row passed the filters.
+                    outputs.write(self._output_path(dest_path), selected)
+        except BaseException:
+            outputs.discard()
+            raise
+        written = outputs.close()
+        # Processing in place keeps the source unless outputs replace it.
+        if dest_path != src_path or (written and all(path != src_path for path, _ in written)):
+            os.remove(src_path)
+        return written
+
+    def _groups(self, dest_path:str, header:list, names:list, columns:list) -> dict:
+        # Maps each output path to its header and source column indices, grouping
+        # columns by the first segment of their original name. Every group file
+        # repeats the key columns so the parts can be joined again.
+        keys = [index for index in columns if names[index] in KEY_COLUMNS]
+        file_keys = _FileKeys()
+        groups = OrderedDict()
+        for index in columns:
+            original = header[index]
+            group = original.split(self.group_sep, 1)[0] if self.group_sep and self.group_sep in original else MAIN_GROUP
+            if index not in keys:
+                groups.setdefault(group, []).append(index)
+        return OrderedDict(
+            (self._output_path(dest_path, file_keys(group)), ([names[index] for index in keys + indices], keys + indices))
+            for group, indices in groups.items()
+        )
@@ -0,0 +1,83 @@
+import json
+import re
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+# KoboToolbox UIDs (assets, imports, exports, users) are long alphanumeric path
+# segments; they are folded so spans of the same endpoint group together.
+UID_SEGMENT = re.compile(r"^[A-Za-z0-9]{16,}")
+
+
+def endpoint_of(url:str) -> str:
+    segments = []
+    for segment in urlsplit(url).path.split("/"):
+        if segment.isdigit():
+            segment = "{id}"
+        else:
+            segment = UID_SEGMENT.sub("{uid}", segment)
+        segments.append(segment)
+    return "/".join(segments)
+
+
+class Profiler:
+    """Collects the spans emitted by :class:`Bifrost` through its ``instrument`` hook.
+
+    Every span is a dict with ``kind`` ("request", "poll" or "download"), ``url``,
+    ``start`` (epoch seconds) and ``duration`` plus kind specific fields such as
+    ``status``, ``bytes``, ``retries`` or ``polls``. Spans are written as NDJSON to
+    ``trace_path`` when given and aggregated per endpoint for :meth:`summary`.
+    """
+
+    def __init__(self, trace_path:Optional[str]= None, summary:bool= True) -> None:
+        self.show_summary = summary
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._trace = open(trace_path, 'w') if trace_path else None
+
+    def __call__(self, span:dict) -> None:
+        span["endpoint"] = endpoint_of(span["url"])
+        with self._lock:
+            if self._trace is not None:
+                self._trace.write(json.dumps(span) + "\n")
+            key = (span["kind"], span.get("method", "GET"), span["endpoint"])
+            stats = self._stats.setdefault(key, {"calls": 0, "errors": 0, "seconds": 0.0, "max": 0.0, "bytes": 0, "retries": 0, "polls": 0})
+            stats["calls"] += 1
+            stats["seconds"] += span["duration"]
+            stats["max"] = max(stats["max"], span["duration"])
+            stats["bytes"] += span.get("bytes") or 0
+            stats["retries"] += span.get("retries") or 0
+            stats["polls"] += span.get("polls") or 0
+            status = span.get("status")
+            if span.get("error") or (span["kind"] == "poll" and status != "complete") or (isinstance(status, int) and status >= 400):
+                stats["errors"] += 1
+
+    def summary(self) -> None:
+        from rich.console import Console
+        from rich.table import Table
+        from rich.filesize import decimal
+        table = Table(title=f"Profile ({time.monotonic() - self.started:.2f}s wall time)")
+        table.add_column("Span", overflow="fold", ratio=1)
+        for column in ("Calls", "Errors", "Total", "Max", "Bytes", "Retries", "Polls"):
+            table.add_column(column, justify="right", no_wrap=True)
+        with self._lock:
+            rows = sorted(self._stats.items(), key=lambda item: item[1]["seconds"], reverse=True)
+        for (kind, method, endpoint), stats in rows:
+            # Request rows are labelled with their HTTP method, poll and download rows with their kind.
+            table.add_row(f"{method if kind == 'request' else kind} {endpoint}", f"{stats['calls']}", f"{stats['errors']}", f"{stats['seconds']:.2f}s",
+                          f"{stats['max']:.2f}s", decimal(stats["bytes"]),
+                          f"{stats['retries']}", f"{stats['polls']}" if kind == "poll" else "-")
+        console = Console(stderr=True)
+        if not console.is_terminal:
+            # Keep endpoints on one line when the summary is redirected to a file.
+            console.width = 160
+        console.print(table)
+
+    def close(self) -> None:
+        if self.show_summary:
+            self.summary()
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
@@ -0,0 +1,157 @@
+import datetime
+import importlib.util
+import json
+import os
+from typing import Optional
+
+COLUMNAR_FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+DEFAULT_BATCH_SIZE = 50000
+
+# XLSForm question types that hold no data of their own.
+NON_DATA_TYPES = ('begin_group', 'end_group', 'begin_repeat', 'end_repeat', 'note')
+
+META_COLUMNS = (
+    ('_id', 'int'),
+    ('_uuid', 'string'),
+    ('_submission_time', 'timestamp'),
+    ('_submitted_by', 'string'),
+    ('_status', 'string'),
+)
+
+QUESTION_TYPES = {
+    'integer': 'int',
+    'decimal': 'float',
+    'range': 'float',
+    'date': 'date',
+}
+
+
+def pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def require_pyarrow():
+    # pyarrow is optional and slow to import, so it is only loaded once a
+    # columnar store is actually written.
+    if not pyarrow_available():
+        raise RuntimeError("Writing a columnar store requires pyarrow. Install it with: pip install 'bifrost-cli[columnar]'")
+    import pyarrow
+    return pyarrow
+
+
+def columns_from_asset(asset:dict) -> list:
+    # Returns (column, kind) pairs for the meta fields followed by every question of
+    # the form definition, keyed by the xpath used in submission JSON. Questions
+    # inside a repeat are stored with their repeat as one JSON encoded column.
+    columns = list(META_COLUMNS)
+    seen = {name for name, _ in columns}
+    groups = []
+    repeat_depth = 0
+    for row in asset.get("content", {}).get("survey", []):
+        row_type = row.get("type", "")
+        name = row.get("$autoname") or row.get("name")
+        if row_type in ('begin_group', 'begin_repeat'):
+            groups.append(name)
+            if row_type == 'begin_repeat':
+                if repeat_depth == 0:
+                    xpath = row.get("$xpath") or "/".join(groups)
+                    if xpath not in seen:
+                        columns.append((xpath, 'json'))
+                        seen.add(xpath)
+                repeat_depth += 1
+            continue
+        if row_type in ('end_group', 'end_repeat'):
+            if groups:
+                groups.pop()
+            if row_type == 'end_repeat':
+                repeat_depth -= 1
+            continue
+        if row_type in NON_DATA_TYPES or repeat_depth or not name:
+            continue
+        xpath = row.get("$xpath") or "/".join(groups + [name])
+        if xpath not in seen:
+            columns.append((xpath, QUESTION_TYPES.get(row_type.split(" ")[0], 'string')))
+            seen.add(xpath)
+    return columns
+
+
+def _convert(value, kind:str):
+    if value is None or value == "":
+        return None
+    try:
+        if kind == 'int':
+            return int(value)
+        if kind == 'float':
+            return float(value)
+        if kind == 'date':
+            return datetime.date.fromisoformat(str(value)[:10])
+        if kind == 'timestamp':
+            return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, (list, dict)) or kind == 'json':
+        return json.dumps(value)
+    return str(value)
+
+
+def _arrow_type(kind:str):
+    pa = require_pyarrow()
+    return {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'date': pa.date32(),
+        'timestamp': pa.timestamp('s'),
+    }.get(kind, pa.string())
+
+
+def _records_to_table(records:list, columns:list):
+    pa = require_pyarrow()
+    arrays = [pa.array([_convert(record.get(name), kind) for record in records], type=_arrow_type(kind)) for name, kind in columns]
+    return pa.Table.from_arrays(arrays, names=[name for name, _ in columns])
+
+
+def _write_partitions(records:list, columns:list, out_dir:str, fmt:str) -> None:
+    by_date = {}
+    for record in records:
+        by_date.setdefault((record.get("_submission_time") or "unknown")[:10], []).append(record)
+    for submission_date, partition in by_date.items():
+        partition_dir = os.path.join(out_dir, f"submission_date={submission_date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        # Named after the first _id so re-running an interrupted conversion
+        # overwrites the same file instead of duplicating rows.
+        file_path = os.path.join(partition_dir, f"part-{partition[0].get('_id', 0)}.{COLUMNAR_FORMATS[fmt]}")
+        tmp_path = f"{file_path}.tmp"
+        table = _records_to_table(partition, columns)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp_path, compression="zstd")
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, file_path)
+
+
+def write_columnar(submissions_path:str, out_dir:str, columns:list, start_offset:int= 0, end_offset:Optional[int]= None,
+                   fmt:str= "parquet", batch_size:int= DEFAULT_BATCH_SIZE) -> tuple:
+    """Convert NDJSON submissions between two byte offsets into a partitioned
+    Parquet/Arrow IPC dataset. Returns (records written, offset reached)."""
+    require_pyarrow()
+    written = 0
+    batch = []
+    with open(submissions_path, 'rb') as submissions:
+        submissions.seek(start_offset)
+        offset = start_offset
+        for line in submissions:
+            if end_offset is not None and offset >= end_offset:
+                break
+            offset += len(line)
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                _write_partitions(batch, columns, out_dir, fmt)
+                written += len(batch)
+                batch = []
+    if batch:
+        _write_partitions(batch, columns, out_dir, fmt)
+        written += len(batch)
+    return written, offset
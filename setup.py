@@ -14,4 +14,8 @@ setup(
         "rich",
         "requests"
     ],
+    extras_require={
+        "columnar": ["pyarrow"],
+        "zstd": ["zstandard"],
+    },
 )
\ No newline at end of file